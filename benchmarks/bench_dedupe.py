@@ -0,0 +1,81 @@
+# Near-duplicate index: initial indexing, the batch duplicate report and
+# "find similar", on a vault seeded with known near-duplicate groups (same
+# tags shuffled, re-weighted, with a different LoRA strength). Also reports
+# how many seeded groups the report found.
+#
+#   python benchmarks/bench_dedupe.py --rows 100000
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from common import WORDS, CATEGORIES, report, timeit
+from vault_db import VaultDB
+import vault_core
+import vault_dedupe
+
+INSERT = "INSERT INTO prompts (title, category, tags, positive, negative, last_used, favorite) VALUES (?, ?, ?, ?, ?, ?, ?)"
+
+def variant(rng, tags, n):
+    tags = list(tags)
+    rng.shuffle(tags)
+    tags[0] = f"({tags[0]}:1.{n + 1})"
+    return ", ".join(tags) + f", <lora:style:0.{n + 5}>"
+
+def make_dedupe_vault(rows, groups, seed=1):
+    # Two-word tags give a vocabulary of ~1600 tags, so unrelated prompts overlap little
+    path = os.path.join(tempfile.mkdtemp(prefix="vault_bench_"), "prompt_vault.db")
+    db = VaultDB(path)
+    db.init_db()
+    rng = random.Random(seed)
+    vocab = [f"{a} {b}" for a in WORDS for b in WORDS if a != b]
+    batch, seeded = [], []
+    for i in range(rows):
+        tags = rng.sample(vocab, 20)
+        negative = ", ".join(rng.sample(vocab, 6))
+        batch.append((f"prompt {i}", rng.choice(CATEGORIES), "", ", ".join(tags), negative, "2024-01-01", 0))
+        if i < groups:
+            seeded.append([f"prompt {i}"])
+            for n in range(rng.randint(1, 3)):
+                batch.append((f"prompt {i} v{n}", rng.choice(CATEGORIES), "", variant(rng, tags, n), negative, "2024-01-01", 0))
+                seeded[-1].append(f"prompt {i} v{n}")
+        if len(batch) >= 5000:
+            db.conn.executemany(INSERT, batch)
+            batch = []
+    db.conn.executemany(INSERT, batch)
+    db.conn.commit()
+    return db, seeded
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--groups", type=int, default=500, help="seeded near-duplicate groups")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    db, seeded = make_dedupe_vault(args.rows, args.groups)
+    print(f"{args.rows} prompts + {sum(len(g) - 1 for g in seeded)} near-duplicates in {len(seeded)} groups")
+
+    start = time.perf_counter()
+    vault_dedupe.sync(db)
+    print(f"{'initial indexing':<40} {time.perf_counter() - start:8.2f} s")
+
+    start = time.perf_counter()
+    groups = vault_dedupe.duplicate_report(db)
+    print(f"{'duplicate report':<40} {time.perf_counter() - start:8.2f} s")
+    titles = {row[0]: row[1] for row in db.conn.execute("SELECT id, title FROM prompts")}
+    found = {frozenset(titles[i] for i in group) for group in groups}
+    hits = sum(frozenset(group) in found for group in seeded)
+    print(f"{'seeded groups found exactly':<40} {hits} / {len(seeded)}   ({len(groups)} groups reported)")
+
+    ids = [db.prompt_id(group[0]) for group in seeded[:args.repeat]]
+    report("find similar", *timeit(lambda: vault_dedupe.find_similar(db, random.choice(ids)), args.repeat))
+    n = iter(range(10 ** 9))
+    report("save (including index update)",
+           *timeit(lambda: vault_core.save_prompt(db, f"new {next(n)}", "Pony", "", "neon alley, rainy street", "", ()),
+                   args.repeat))
+    db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# Revision history on heavily iterated prompts: every prompt is saved many
+# times with small edits (a tag added, dropped or re-weighted). The prompts
+# start out as one bulk insert, the way an import writes them, so the first
+# round of saves lands on titles still queued for indexing. Reports the
+# history's size against keeping full copies, and save / revision read /
+# compaction times.
+#
+#   python benchmarks/bench_history.py --prompts 1000 --edits 50
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from common import WORDS, random_text, report, timeit
+import vault_core
+import vault_history
+
+def tweak(rng, text):
+    tags = text.split(", ")
+    r = rng.random()
+    if r < 0.4:
+        tags.insert(rng.randrange(len(tags) + 1), rng.choice(WORDS))
+    elif r < 0.7 and len(tags) > 1:
+        tags.pop(rng.randrange(len(tags)))
+    else:
+        tags[rng.randrange(len(tags))] = f"({rng.choice(WORDS)}:1.{rng.randrange(10)})"
+    return ", ".join(tags)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--prompts", type=int, default=1000)
+    parser.add_argument("--edits", type=int, default=50, help="saves per prompt after the first")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    db = vault_core.open_vault(os.path.join(tempfile.mkdtemp(prefix="vault_bench_"), "prompt_vault.db"))
+    rng = random.Random(1)
+    texts = {f"prompt {i}": [random_text(rng, 30), random_text(rng, 10)] for i in range(args.prompts)}
+    with db.conn:
+        db.conn.executemany("INSERT INTO prompts (title, category, tags, positive, negative) VALUES (?, 'Pony', '', ?, ?)",
+                            [(title, pos, neg) for title, (pos, neg) in texts.items()])
+    full = 0
+    start = time.perf_counter()
+    for _ in range(args.edits):
+        for title, fields in texts.items():
+            full += len("Pony".encode()) + len(fields[0].encode()) + len(fields[1].encode())
+            fields[0] = tweak(rng, fields[0])
+            if rng.random() < 0.2:
+                fields[1] = tweak(rng, fields[1])
+            vault_core.save_prompt(db, title, "Pony", "", fields[0], fields[1], ())
+    saves = args.prompts * args.edits
+    print(f"{args.prompts} prompts x {args.edits} edits")
+    print(f"{'save (incl. revision)':<40} {(time.perf_counter() - start) / saves * 1000:8.3f} ms avg")
+    stored = db.conn.execute("SELECT COUNT(*), SUM(length(data)) FROM prompt_revisions").fetchone()
+    print(f"{'revisions':<40} {stored[0]}")
+    print(f"{'history size':<40} {stored[1] / 1024:8.1f} KiB   ({full / 1024:.1f} KiB as full copies, "
+          f"{full / stored[1]:.1f}x smaller)")
+
+    ids = [row[0] for row in db.conn.execute("SELECT id FROM prompt_revisions")]
+    report("read one revision", *timeit(lambda: vault_history.revision(db, rng.choice(ids)), args.repeat))
+    prompt_id = db.prompt_id("prompt 0")
+    report("list a prompt's revisions", *timeit(lambda: vault_history.revisions(db, prompt_id), args.repeat))
+    start = time.perf_counter()
+    removed = vault_history.compact(db, keep=args.edits // 2)
+    print(f"{'compact to ' + str(args.edits // 2) + ' per prompt':<40} {time.perf_counter() - start:8.2f} s   ({removed} removed)")
+    db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# Per-keystroke latency of the search box: the old connect-per-helper code path
+# (LIKE scan + two COUNTs, each on a fresh connection) vs. the shared VaultDB.
+#
+#   python benchmarks/bench_keystroke.py --rows 100000
+import argparse
+import sqlite3
+
+from common import make_vault, report, timeit
+from vault_db import VaultDB
+
+LIKE_QUERY = ("SELECT title, category, favorite FROM prompts WHERE 1=1 AND (lower(title) LIKE ? OR lower(tags) LIKE ? "
+              "OR lower(positive) LIKE ? OR lower(negative) LIKE ? OR lower(category) LIKE ?) ORDER BY last_used DESC")
+
+def old_keystroke(path, search):
+    conn = sqlite3.connect(path)
+    conn.execute(LIKE_QUERY, [f"%{search}%"] * 5).fetchall()
+    conn.close()
+    conn = sqlite3.connect(path)
+    conn.execute("SELECT COUNT(*) FROM prompts").fetchone()
+    conn.execute("SELECT COUNT(*) FROM prompts WHERE favorite=1").fetchone()
+    conn.close()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--search", action="append",
+                        help="search text to time (repeatable; default: a common word, a rare word and a title)")
+    args = parser.parse_args()
+
+    path = make_vault(args.rows)
+    db = VaultDB(path)
+    db.init_db()
+    print(f"{args.rows} prompts")
+    for search in args.search or ["dragon", "prompt 4242", "title:prompt 1999"]:
+        print(f"search {search!r}")
+        report("  connect per call + LIKE", *timeit(lambda: old_keystroke(path, search), args.repeat))
+        def new_keystroke():
+            db.query_prompts("p.title, p.category, p.favorite", "All", search)
+            db.counts()
+        report("  shared VaultDB (WAL, FTS5)", *timeit(new_keystroke, args.repeat))
+    db.close()
+
+if __name__ == "__main__":
+    main()
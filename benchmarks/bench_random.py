@@ -0,0 +1,40 @@
+# Random pick latency: the old "fetch every matching title, random.choice" path
+# vs. vault_random.RandomPicker in each mode.
+#
+#   python benchmarks/bench_random.py                 # 10k and 1M prompts
+#   python benchmarks/bench_random.py --rows 100000
+import argparse
+import random
+
+from common import make_vault, report, timeit
+from vault_db import VaultDB
+from vault_random import MODES, RandomPicker
+
+FILTERS = [("All", ""), ("Pony", ""), ("Favorites", ""), ("All", "dragon castle")]
+
+def old_pick(db, cat, search):
+    titles = [row[0] for row in db.query_prompts("p.title", cat, search, order=False)]
+    return random.choice(titles) if titles else None
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, action="append")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    for rows in args.rows or [10000, 1000000]:
+        db = VaultDB(make_vault(rows))
+        db.init_db()
+        print(f"\n{rows} prompts")
+        for cat, search in FILTERS:
+            label = f"{cat}" + (f" + '{search}'" if search else "")
+            print(label)
+            report("  materialize + random.choice", *timeit(lambda: old_pick(db, cat, search), max(3, args.repeat // 10)))
+            for mode in MODES:
+                picker = RandomPicker()
+                picker.pick(db, cat, search, mode)  # first call may build the filter's id cache
+                report(f"  {mode}", *timeit(lambda: picker.pick(db, cat, search, mode), args.repeat))
+        db.close()
+
+if __name__ == "__main__":
+    main()
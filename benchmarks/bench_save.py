@@ -0,0 +1,55 @@
+# Save latency against vault size: saving and then reloading the view (first
+# page query, counts, category list) as the GUI used to, vs. saving and
+# applying the change event in place. Tk work (rebuilding the Listbox vs.
+# inserting one line) isn't included, so the real gap is wider.
+#
+#   python benchmarks/bench_save.py --rows 1000 --rows 10000 --rows 100000
+import argparse
+import itertools
+
+from common import make_vault, report, timeit
+from vault_db import VaultDB
+from vault_listview import Totals, fetch_first_page
+import vault_core
+import vault_dedupe
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, action="append", help="vault size (repeatable; default: 1k, 10k, 100k)")
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    for rows in args.rows or [1000, 10000, 100000]:
+        db = VaultDB(make_vault(rows))
+        db.init_db()
+        # Index the whole vault for near-duplicates first, as a vault in use would be
+        vault_dedupe.sync(db)
+        n = itertools.count()
+        print(f"{rows} prompts")
+        for cat, search in (("All", ""), ("All", "neon")):
+            print(f"  view {cat!r} search {search!r}")
+
+            def save():
+                vault_core.save_prompt(db, f"new {next(n)}", "Pony", "neon, alley", "neon alley, rainy street", "", ())
+                db.set_setting("last_category", "Pony")
+
+            def save_and_reload():
+                save()
+                fetch_first_page(db, cat, search)
+                db.counts()
+                vault_core.categories(db)
+                db.get_setting("last_category")
+            report("    save + reload view", *timeit(save_and_reload, args.repeat))
+
+            totals = Totals(db)
+            def on_change(op, prompt_id, fields):
+                totals.apply(op, fields)
+                if search:
+                    db.matches(prompt_id, cat, search)
+            db.listeners.append(on_change)
+            report("    save + change event", *timeit(save, args.repeat))
+            db.listeners.remove(on_change)
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# Semantic index: the initial build, single and batched top-k queries (with and
+# without a category filter), "more like this", and saves (new and over an
+# existing title) that update the index, on a generated vault.
+#
+#   python benchmarks/bench_semantic.py --rows 100000
+import argparse
+import os
+import random
+import time
+
+from common import WORDS, make_vault, report, timeit
+from vault_db import VaultDB
+import vault_core
+import vault_dedupe
+import vault_semantic
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--batch", type=int, default=16, help="queries per batched call")
+    args = parser.parse_args()
+    if not vault_semantic.available():
+        raise SystemExit(vault_semantic.NEEDS_NUMPY)
+
+    db = VaultDB(make_vault(args.rows))
+    db.init_db()
+    # Saving over an imported title, with the near-duplicate queue still full
+    # and no semantic index yet, must neither fail nor queue anything
+    vault_core.save_prompt(db, "prompt 0", "Pony", "", "neon alley, rainy street", "", ())
+    assert not db.conn.execute("SELECT COUNT(*) FROM semantic_dirty").fetchone()[0]
+    # Index the near-duplicates first so saves time only their own work
+    vault_dedupe.sync(db)
+    start = time.perf_counter()
+    vault_semantic.build(db)
+    print(f"{'initial build':<40} {time.perf_counter() - start:8.2f} s")
+    size = os.path.getsize(vault_semantic.vectors_path(db.path)) + os.path.getsize(vault_semantic.state_path(db.path))
+    print(f"{'index files':<40} {size / 2 ** 20:8.1f} MiB")
+
+    rng = random.Random(2)
+    queries = [" ".join(rng.sample(WORDS, 3)) for _ in range(256)]
+    report("query", *timeit(lambda: vault_semantic.search(db, [rng.choice(queries)], 50), args.repeat))
+    report(f"batch of {args.batch} queries",
+           *timeit(lambda: vault_semantic.search(db, rng.sample(queries, args.batch), 50), args.repeat))
+    report("query in one category", *timeit(lambda: vault_semantic.search(db, [rng.choice(queries)], 50, "Pony"),
+                                            args.repeat))
+    low, high = db.id_range()
+    report("more like this", *timeit(lambda: vault_semantic.more_like(db, rng.randint(low, high), 50), args.repeat))
+    n = iter(range(10 ** 9))
+    report("save (including index update)",
+           *timeit(lambda: vault_core.save_prompt(db, f"new {next(n)}", "Pony", "", "neon alley, rainy street", "", ()),
+                   args.repeat))
+    report("save over an existing title",
+           *timeit(lambda: vault_core.save_prompt(db, f"prompt {rng.randrange(args.rows)}", "Pony", "",
+                                                  f"neon alley, {rng.choice(WORDS)} street", "", ()), args.repeat))
+    assert not db.conn.execute("SELECT COUNT(*) FROM semantic_dirty").fetchone()[0]
+    db.close()
+
+if __name__ == "__main__":
+    main()
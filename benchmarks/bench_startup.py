@@ -0,0 +1,67 @@
+# Cold start of the window: time to first paint (window mapped and drawn) and
+# time to interactive (first page of prompts listed), measured from process
+# launch. Each run starts a fresh process on a generated vault; the app writes
+# its milestones to the file in VAULT_STARTUP_TRACE and closes itself. Needs a
+# display.
+#
+#   python benchmarks/bench_startup.py --rows 100000
+#   python benchmarks/bench_startup.py --build            # PyInstaller build from vault.spec, then time it
+#   python benchmarks/bench_startup.py --exe dist/vault.exe
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import make_vault, report
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def build_exe():
+    subprocess.run([sys.executable, "-m", "PyInstaller", "--noconfirm", "vault.spec"], cwd=ROOT, check=True)
+    exe = os.path.join(ROOT, "dist", "vault.exe" if os.name == "nt" else "vault")
+    if not os.path.exists(exe):
+        raise SystemExit(f"Build finished but {exe} is missing")
+    return exe
+
+def launch(command, folder, timeout):
+    # Returns {milestone: seconds since launch}
+    trace = os.path.join(folder, "startup_trace.txt")
+    if os.path.exists(trace):
+        os.remove(trace)
+    env = dict(os.environ, VAULT_STARTUP_TRACE=trace)
+    start = time.time()
+    subprocess.run(command, cwd=folder, env=env, timeout=timeout, check=True)
+    with open(trace) as f:
+        return {event: float(stamp) - start for event, stamp in (line.split() for line in f)}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--exe", help="time this built executable instead of `python vault.py`")
+    parser.add_argument("--build", action="store_true", help="build dist/vault with PyInstaller first and time it")
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    exe = build_exe() if args.build else args.exe
+    command = [os.path.abspath(exe)] if exe else [sys.executable, os.path.join(ROOT, "vault.py")]
+    # The app opens prompt_vault.db in its working directory
+    folder = tempfile.mkdtemp(prefix="vault_bench_")
+    make_vault(args.rows, path=os.path.join(folder, "prompt_vault.db"))
+    print(f"{args.rows} prompts, {' '.join(command)}")
+    try:
+        runs = [launch(command, folder, args.timeout) for _ in range(args.runs + 1)]
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+    # The first launch also warms the OS file cache; it's reported on its own
+    print(f"{'first launch: first paint':<40} {runs[0]['first_paint'] * 1000:8.1f} ms")
+    print(f"{'first launch: interactive':<40} {runs[0]['interactive'] * 1000:8.1f} ms")
+    for event, label in (("first_paint", "time to first paint"), ("interactive", "time to interactive")):
+        samples = sorted(run[event] for run in runs[1:])
+        report(label, samples[len(samples) // 2], samples[int(len(samples) * 0.95)])
+
+if __name__ == "__main__":
+    main()
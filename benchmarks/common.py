@@ -0,0 +1,48 @@
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vault_db import VaultDB
+
+WORDS = ("girl cat neon alley rain street night city cyberpunk portrait forest castle dragon knight "
+         "smile dress armor sword sunset ocean beach snow mountain river flower garden glow moody "
+         "cinematic lighting bokeh photo anime sketch detailed masterpiece hair eyes blue red").split()
+CATEGORIES = ["Juggernaut", "Pony", "IPA Subgraph", "Upscale", "Video Gen", "SDXL"]
+
+def random_text(rng, n):
+    return ", ".join(rng.choice(WORDS) for _ in range(n))
+
+def make_vault(rows, path=None, seed=1):
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="vault_bench_"), "prompt_vault.db")
+    db = VaultDB(path)
+    db.init_db()
+    rng = random.Random(seed)
+    batch = []
+    for i in range(rows):
+        batch.append((f"prompt {i}", rng.choice(CATEGORIES), random_text(rng, 3), random_text(rng, 30),
+                      random_text(rng, 10), f"2024-01-01 00:{(i // 60) % 60:02d}:{i % 60:02d}", int(rng.random() < 0.1)))
+        if len(batch) == 5000:
+            db.conn.executemany("INSERT INTO prompts (title, category, tags, positive, negative, last_used, favorite) VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+            batch = []
+    if batch:
+        db.conn.executemany("INSERT INTO prompts (title, category, tags, positive, negative, last_used, favorite) VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+    db.conn.commit()
+    db.close()
+    return path
+
+def timeit(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2], samples[int(len(samples) * 0.95)]
+
+def report(label, median, p95):
+    print(f"{label:<40} median {median * 1000:8.2f} ms   p95 {p95 * 1000:8.2f} ms")
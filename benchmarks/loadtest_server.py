@@ -0,0 +1,96 @@
+# Load test for the prompt service (python -m vault serve).
+#
+#   python benchmarks/loadtest_server.py --rows 100000 --workers 32 --seconds 10
+#   python benchmarks/loadtest_server.py --url http://127.0.0.1:8765 --workers 64
+#
+# Without --url a vault with --rows prompts is generated and a server is started
+# on a free port for the duration of the run. Each worker keeps one keep-alive
+# connection open and loops over the --mix of requests.
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+from urllib.parse import quote, urlsplit
+
+from common import CATEGORIES, make_vault
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def request_for(kind, rng, rows):
+    if kind == "random":
+        return f"/random?category={quote(rng.choice(CATEGORIES))}&pony=1&touch=1"
+    if kind == "prompt":
+        return f"/prompt?title={quote(f'prompt {rng.randrange(rows)}')}&pony=1"
+    if kind == "search":
+        return f"/search?q={quote(rng.choice(['dragon', 'neon alley', 'tags:cat', 'castle sunset']))}&limit=20"
+    return "/categories"
+
+async def worker(host, port, kinds, rows, deadline, latencies, errors, seed):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            target = request_for(rng.choice(kinds), rng, rows)
+            start = time.perf_counter()
+            writer.write(f"GET {target} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+            await writer.drain()
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.decode("latin-1").split("\r\n"):
+                if line.lower().startswith("content-length:"):
+                    length = int(line.split(":", 1)[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if not head.startswith(b"HTTP/1.1 200") and not head.startswith(b"HTTP/1.1 404"):
+                errors.append(head.split(b"\r\n", 1)[0])
+    finally:
+        writer.close()
+
+async def run_load(host, port, args):
+    latencies, errors = [], []
+    kinds = args.mix.split(",")
+    deadline = time.perf_counter() + args.seconds
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(host, port, kinds, args.rows, deadline, latencies, errors, i)
+                           for i in range(args.workers)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+    print(f"{len(latencies)} requests in {elapsed:.1f}s from {args.workers} workers ({args.mix})")
+    print(f"throughput {len(latencies) / elapsed:,.0f} req/s")
+    print(f"latency    p50 {pct(0.50):.2f} ms   p95 {pct(0.95):.2f} ms   p99 {pct(0.99):.2f} ms")
+    if errors:
+        print(f"{len(errors)} errors, first: {errors[0]!r}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", help="test an already running server instead of starting one")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--mix", default="random,prompt,prompt,search")
+    args = parser.parse_args()
+
+    if args.url:
+        url = urlsplit(args.url)
+        asyncio.run(run_load(url.hostname, url.port or 80, args))
+        return
+
+    path = make_vault(args.rows)
+    server = subprocess.Popen([sys.executable, "-m", "vault", "--db", path, "serve", "--port", "0",
+                               "--readers", str(args.readers)], cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    try:
+        line = server.stdout.readline()
+        address = line.rsplit("http://", 1)[1].strip()
+        host, port = address.rsplit(":", 1)
+        asyncio.run(run_load(host, int(port), args))
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == "__main__":
+    main()
@@ -5,8 +5,8 @@ a = Analysis(
     ['vault.py'],
     pathex=[],
     binaries=[],
-    datas=[],
-    hiddenimports=[],
+    datas=[('moon_key_about.png', '.')],
+    hiddenimports=['vault_gui', 'vault_cli'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -0,0 +1,203 @@
+import argparse
+import gzip
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from vault_db import DB_PATH, VaultDB
+
+# --- Backup / restore ---
+# Backups go through SQLite's online backup API, so they capture a consistent
+# snapshot even while the app (or the prompt service) is writing. The copy is
+# made in steps of BACKUP_PAGES pages inside one read transaction: in WAL mode
+# that pins a snapshot without blocking writers, and keeps writes from other
+# connections from restarting the copy.
+#
+# Restores are checked with PRAGMA integrity_check first and then copied into
+# the live database with the backup API, BACKUP_PAGES pages per step so
+# progress can be reported. The write transaction on the live database stays
+# open from the first step until the last: other connections see either the
+# old vault or the new one, never a mix of the two.
+
+BACKUP_PAGES = 256
+COMPRESSED_EXT = ".gz"
+AUTO_PREFIX = "prompt_vault_auto_"
+AUTO_SETTINGS = (
+    # key, default
+    ("auto_backup_hours", "0"),  # 0 = off
+    ("auto_backup_keep", "7"),
+    ("auto_backup_dir", ""),  # "" = a backups folder next to the vault
+    ("auto_backup_compress", "1"),
+    ("last_auto_backup", ""),
+)
+
+def is_compressed(path):
+    return path.lower().endswith(COMPRESSED_EXT)
+
+def check_database(path, full=True):
+    # Raises ValueError unless `path` is a sound SQLite file holding a vault
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            result = conn.execute("PRAGMA integrity_check" if full else "PRAGMA quick_check").fetchall()
+            has_prompts = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='prompts'").fetchone()
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError as e:
+        raise ValueError(f"{os.path.basename(path)} is not a usable vault: {e}")
+    if result != [("ok",)]:
+        raise ValueError(f"{os.path.basename(path)} failed its integrity check: "
+                         + "; ".join(row[0] for row in result[:5]))
+    if not has_prompts:
+        raise ValueError(f"{os.path.basename(path)} is not a prompt vault")
+
+def backup_database(db, dest, compress=None, progress=None, pause=0.0):
+    # progress(done, total) is called after every step; pause sleeps between
+    # steps so scheduled backups leave the disk to interactive use
+    compress = is_compressed(dest) if compress is None else compress
+    folder, name = os.path.split(os.path.abspath(dest))
+    tmp = os.path.join(folder, f".{name}.part")
+
+    def step(status, remaining, total):
+        if progress:
+            progress(total - remaining, total)
+        if pause:
+            time.sleep(pause)
+
+    try:
+        target = sqlite3.connect(tmp)
+        try:
+            db.conn.commit()
+            db.conn.execute("BEGIN")
+            db.conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            try:
+                db.conn.backup(target, pages=BACKUP_PAGES, progress=step)
+            finally:
+                db.conn.rollback()
+            # A backup of a WAL vault is a WAL file too; make it self-contained
+            target.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            target.close()
+        check_database(tmp, full=False)
+        if compress:
+            with open(tmp, "rb") as src, gzip.open(tmp + COMPRESSED_EXT, "wb", compresslevel=6) as out:
+                shutil.copyfileobj(src, out, 1 << 20)
+            os.remove(tmp)
+            tmp += COMPRESSED_EXT
+        os.replace(tmp, dest)
+    finally:
+        for leftover in (tmp, tmp + COMPRESSED_EXT):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+    return dest
+
+def restore_database(db, source, progress=None):
+    # Copies a (possibly compressed) backup over the vault `db` is connected to.
+    # Other connections to the vault stay valid and see the restored data.
+    tmp = None
+    try:
+        if is_compressed(source):
+            fd, tmp = tempfile.mkstemp(suffix=".db", prefix=".restore-", dir=os.path.dirname(os.path.abspath(db.path)))
+            with os.fdopen(fd, "wb") as out, gzip.open(source, "rb") as src:
+                shutil.copyfileobj(src, out, 1 << 20)
+            source = tmp
+        if progress:
+            progress(0, 1)
+        check_database(source, full=True)
+
+        def step(status, remaining, total):
+            if progress:
+                progress(total - remaining, total)
+
+        src = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+        try:
+            src.backup(db.conn, pages=BACKUP_PAGES, progress=step)
+        finally:
+            src.close()
+        # Older backups may predate the FTS index, stats or presets tables
+        db.init_db()
+        db.checkpoint()
+    finally:
+        if tmp and os.path.exists(tmp):
+            os.remove(tmp)
+
+# --- Scheduled backups ---
+def auto_settings(db):
+    return {key: db.get_setting(key, default) for key, default in AUTO_SETTINGS}
+
+def auto_backup_dir(db, settings):
+    return settings["auto_backup_dir"] or os.path.join(os.path.dirname(os.path.abspath(db.path)), "backups")
+
+def auto_backup_due(db, now=None):
+    settings = auto_settings(db)
+    hours = float(settings["auto_backup_hours"] or 0)
+    if hours <= 0:
+        return False
+    if not settings["last_auto_backup"]:
+        return True
+    last = datetime.strptime(settings["last_auto_backup"], "%Y-%m-%d %H:%M:%S")
+    return (now or datetime.now()) - last >= timedelta(hours=hours)
+
+def rotate_backups(folder, keep):
+    # Auto backup names sort by time, so the oldest come first
+    names = sorted(name for name in os.listdir(folder) if name.startswith(AUTO_PREFIX))
+    for name in names[:max(len(names) - keep, 0)]:
+        os.remove(os.path.join(folder, name))
+
+def run_auto_backup(db, progress=None, pause=0.0):
+    settings = auto_settings(db)
+    folder = auto_backup_dir(db, settings)
+    os.makedirs(folder, exist_ok=True)
+    now = datetime.now()
+    name = AUTO_PREFIX + now.strftime("%Y-%m-%d_%H%M%S") + ".db"
+    if settings["auto_backup_compress"] == "1":
+        name += COMPRESSED_EXT
+    dest = backup_database(db, os.path.join(folder, name), progress=progress, pause=pause)
+    db.set_setting("last_auto_backup", now.strftime("%Y-%m-%d %H:%M:%S"))
+    rotate_backups(folder, int(settings["auto_backup_keep"] or 1))
+    return dest
+
+# --- Command line ---
+def add_commands(sub):
+    p = sub.add_parser("backup", help="copy the vault to a backup file (.gz compresses)")
+    p.add_argument("file", nargs="?", help="backup file; omit with --auto")
+    p.add_argument("--compress", action="store_true", help="gzip the backup whatever its name")
+    p.add_argument("--auto", action="store_true",
+                   help="write a rotating backup to the auto backup folder (for cron / Task Scheduler)")
+    p = sub.add_parser("restore", help="replace the vault with a backup after checking it")
+    p.add_argument("file")
+
+def run_command(db, args):
+    report = lambda done, total: print(f"\r{done * 100 // max(total, 1)}%", end="", file=sys.stderr, flush=True)
+    try:
+        if args.command == "restore":
+            restore_database(db, args.file, report)
+            print(f"\rRestored {db.path} from {args.file}", file=sys.stderr)
+        elif args.auto:
+            print(f"\rBacked up to {run_auto_backup(db, report)}", file=sys.stderr)
+        elif args.file:
+            backup_database(db, args.file, args.compress or None, report)
+            print(f"\rBacked up to {args.file}", file=sys.stderr)
+        else:
+            raise SystemExit("Give a backup file or --auto.")
+    except (ValueError, OSError, sqlite3.Error) as e:
+        raise SystemExit(f"\n{e}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="vault_backup", description="Backup/restore for AI Prompt Vault")
+    parser.add_argument("--db", default=DB_PATH, help="vault database (default: %(default)s)")
+    add_commands(parser.add_subparsers(dest="command", required=True))
+    args = parser.parse_args(argv)
+    db = VaultDB(args.db)
+    db.init_db()
+    try:
+        run_command(db, args)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
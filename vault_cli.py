@@ -0,0 +1,298 @@
+import argparse
+import json
+import sys
+
+import vault_backup
+import vault_core
+import vault_dedupe
+import vault_history
+import vault_io
+import vault_presets
+import vault_random
+import vault_tags
+from vault_db import DB_PATH
+
+# --- Command line ---
+# python -m vault <command> ...   (no command starts the GUI)
+
+def formatted(db, record, args):
+    names = vault_core.preset_names(args.pony, args.realism, args.preset)
+    try:
+        return vault_core.format_prompt(db, record["positive"], record["negative"], names, record["id"])
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+def prompt_text(db, record, args):
+    pos, neg = formatted(db, record, args)
+    if args.part == "positive":
+        return pos
+    if args.part == "negative":
+        return neg
+    return f"{pos}\n\nNegative Prompt:\n{neg}"
+
+def print_prompt(db, record, args):
+    if args.json:
+        pos, neg = formatted(db, record, args)
+        print(json.dumps(dict(record, positive=pos, negative=neg), ensure_ascii=False))
+    else:
+        print(prompt_text(db, record, args))
+
+def lookup(db, key, by_id):
+    record = vault_core.get_prompt(db, int(key) if by_id else key)
+    if record is None:
+        raise SystemExit(f"No prompt named '{key}'" if not by_id else f"No prompt with id {key}")
+    return record
+
+def tag_search(args, text):
+    return vault_tags.with_tags(text, ", ".join(args.tag))
+
+def semantic(fn, *args):
+    try:
+        return fn(*args)
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+def cmd_search(db, args):
+    if args.semantic:
+        found = semantic(vault_core.semantic_search, db, args.text, args.category, args.limit, tag_search(args, ""))
+    else:
+        found = [(record, None) for record in vault_core.search(db, tag_search(args, args.text), args.category, args.limit)]
+    for record, score in found:
+        if args.json:
+            print(json.dumps(record if score is None else dict(record, score=score), ensure_ascii=False))
+        else:
+            star = "★ " if record["favorite"] else ""
+            print(("" if score is None else f"{score:.2f}\t") + f"{record['id']}\t[{record['category']}] {star}{record['title']}")
+
+def cmd_get(db, args):
+    print_prompt(db, lookup(db, args.key, args.id), args)
+
+def cmd_random(db, args):
+    prompt_id = vault_core.random_prompt_id(db, args.category, tag_search(args, args.search), args.mode)
+    if prompt_id is None:
+        raise SystemExit("No prompts match current filter.")
+    if not args.no_touch:
+        vault_core.touch(db, prompt_id)
+    print_prompt(db, db.prompt_record(prompt_id), args)
+
+def cmd_add(db, args):
+    pos = sys.stdin.read() if args.positive == "-" else args.positive
+    try:
+        names = vault_core.preset_names(args.pony, args.realism, args.preset)
+        prompt_id = vault_core.save_prompt(db, args.title, args.category, args.tags, pos, args.negative, names)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    print(prompt_id)
+
+def cmd_copy(db, args):
+    import pyperclip
+    pyperclip.copy(prompt_text(db, lookup(db, args.key, args.id), args))
+
+def cmd_history(db, args):
+    if args.compact:
+        print(f"Removed {vault_history.compact(db, args.keep, args.days)} revisions", file=sys.stderr)
+        return
+    if args.key is None:
+        raise SystemExit("Give a prompt title (or id with --id), or --compact.")
+    record = lookup(db, args.key, args.id)
+    revs = vault_history.revisions(db, record["id"])
+    if args.show is not None or args.restore is not None:
+        number = args.show if args.show is not None else args.restore
+        rev = next((rev for rev in revs if rev["number"] == number), None)
+        if rev is None:
+            raise SystemExit(f"'{record['title']}' has no revision {number}")
+        if args.restore is not None:
+            vault_core.restore_revision(db, rev["id"])
+            print(f"Restored '{record['title']}' to revision {number}", file=sys.stderr)
+            return
+        old = vault_history.revision(db, rev["id"])
+        if args.json:
+            print(json.dumps(dict(old, number=number), ensure_ascii=False))
+        else:
+            print(f"Revision {number} of '{record['title']}', replaced {old['replaced_at']}")
+            print(f"Category: {old['category']}\nTags: {old['tags']}\n\n{old['positive']}\n\nNegative Prompt:\n{old['negative']}")
+        return
+    for rev in revs:
+        if args.json:
+            print(json.dumps(rev))
+        else:
+            print(f"{rev['number']}\treplaced {rev['replaced_at']}\t{rev['bytes']} bytes")
+
+def cmd_similar(db, args):
+    record = lookup(db, args.key, args.id)
+    if args.semantic:
+        found = [(other, score) for other, score in semantic(vault_core.more_like, db, record["id"], args.limit)
+                 if args.min is None or score >= args.min]
+    else:
+        # A one-shot command can afford to index the whole queue for complete results
+        found = vault_core.similar_prompts(db, record["id"], args.limit,
+                                           vault_dedupe.SIMILAR_MIN if args.min is None else args.min, sync_limit=None)
+    for other, score in found:
+        if args.json:
+            print(json.dumps(dict(other, similarity=score), ensure_ascii=False))
+        else:
+            print(f"{score:.0%}\t{other['id']}\t[{other['category']}] {other['title']}")
+
+def cmd_dupes(db, args):
+    groups = vault_dedupe.describe_groups(db, vault_dedupe.duplicate_report(db, args.min, sync_limit=None))
+    for group in groups:
+        if args.json:
+            print(json.dumps(group, ensure_ascii=False))
+        else:
+            print("\n".join(f"{m['similarity']:.0%}\t{m['id']}\t[{m['category']}] {m['title']}" for m in group) + "\n")
+
+def cmd_tags(db, args):
+    if args.prefix is not None:
+        for name in vault_tags.TagTrie(db.tag_counts()).complete(args.prefix, args.limit):
+            print(name)
+        return
+    for name, count in db.tag_facets(args.category, tag_search(args, args.search), args.limit):
+        print(json.dumps({"tag": name, "count": count}, ensure_ascii=False) if args.json else f"{count}\t{name}")
+
+def cmd_presets(db, args):
+    if args.action == "list":
+        for preset in vault_presets.list_presets(db):
+            print(json.dumps(preset, ensure_ascii=False) if args.json else
+                  f"{preset['name']} (v{preset['version']}{', built-in' if preset['builtin'] else ''})")
+        return
+    if not args.name:
+        raise SystemExit("A preset name is required.")
+    if args.action == "set":
+        vault_presets.save_preset(db, args.name, args.positive_prefix, args.positive_suffix,
+                                  args.negative_prefix, args.negative_suffix)
+    else:
+        vault_presets.delete_preset(db, args.name)
+
+def add_tag_args(parser):
+    parser.add_argument("--tag", action="append", default=[],
+                        help="only prompts with this exact tag; a|b for either (repeat to require several)")
+
+def add_preset_args(parser):
+    parser.add_argument("--pony", action="store_true", help="apply the Pony preset")
+    parser.add_argument("--realism", action="store_true", help="apply the Realism preset")
+    parser.add_argument("--preset", action="append", default=[], help="apply a preset by name (repeatable)")
+
+def add_output_args(parser):
+    parser.add_argument("--part", choices=("positive", "negative", "both"), default="both")
+    add_preset_args(parser)
+    parser.add_argument("--json", action="store_true", help="print the whole record as JSON")
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="vault", description="AI Prompt Vault. Run without a command to open the window.")
+    parser.add_argument("--db", default=DB_PATH, help="vault database (default: %(default)s)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("search", help="list prompts matching a search")
+    p.add_argument("text", nargs="?", default="")
+    p.add_argument("--category", default="All", help="category, Favorites or All (default: %(default)s)")
+    p.add_argument("--limit", type=int, default=50)
+    add_tag_args(p)
+    p.add_argument("--semantic", action="store_true",
+                   help="rank by meaning instead of matching keywords; needs numpy (builds the index on first use)")
+    p.add_argument("--json", action="store_true", help="one JSON record per line")
+    p.set_defaults(run=cmd_search)
+
+    p = sub.add_parser("history", help="earlier versions of a prompt: list, show, restore; or trim all history")
+    p.add_argument("key", nargs="?", help="title (or id with --id)")
+    p.add_argument("--id", action="store_true")
+    p.add_argument("--show", type=int, metavar="N", help="print revision N (1 = oldest kept)")
+    p.add_argument("--restore", type=int, metavar="N", help="make revision N the current text")
+    p.add_argument("--compact", action="store_true", help="apply the retention limits to every prompt")
+    p.add_argument("--keep", type=int, help="with --compact: revisions kept per prompt (default: history_keep setting)")
+    p.add_argument("--days", type=float, help="with --compact: drop revisions older than this (default: history_days setting)")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(run=cmd_history)
+
+    p = sub.add_parser("similar", help="prompts that read almost like the given one")
+    p.add_argument("key", help="title (or id with --id)")
+    p.add_argument("--id", action="store_true")
+    p.add_argument("--limit", type=int, default=20)
+    p.add_argument("--min", type=float, help=f"minimum similarity 0-1 (default: {vault_dedupe.SIMILAR_MIN}, none with --semantic)")
+    p.add_argument("--semantic", action="store_true", help="prompts about the same things, not just near-copies; needs numpy")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(run=cmd_similar)
+
+    p = sub.add_parser("dupes", help="report groups of near-duplicate prompts")
+    p.add_argument("--min", type=float, default=vault_dedupe.DUPLICATE_MIN, help="minimum similarity 0-1 (default: %(default)s)")
+    p.add_argument("--json", action="store_true", help="one JSON array per group")
+    p.set_defaults(run=cmd_dupes)
+
+    p = sub.add_parser("tags", help="most used tags in a filter, or completions of a prefix")
+    p.add_argument("--category", default="All")
+    p.add_argument("--search", default="")
+    add_tag_args(p)
+    p.add_argument("--prefix", help="print the most used tags starting with this")
+    p.add_argument("--limit", type=int, default=20)
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(run=cmd_tags)
+
+    p = sub.add_parser("get", help="print a prompt by title")
+    p.add_argument("key", help="title (or id with --id)")
+    p.add_argument("--id", action="store_true", help="look the prompt up by id")
+    add_output_args(p)
+    p.set_defaults(run=cmd_get)
+
+    p = sub.add_parser("random", help="print a random prompt from a filter")
+    p.add_argument("--category", default="All")
+    p.add_argument("--search", default="")
+    p.add_argument("--mode", choices=vault_random.MODES, default="uniform",
+                   help="favorites: weight favorites up, lru: least recently used first, "
+                        "shuffle: no repeats until the filter is exhausted (per process)")
+    add_tag_args(p)
+    p.add_argument("--no-touch", action="store_true", help="don't update last used")
+    add_output_args(p)
+    p.set_defaults(run=cmd_random)
+
+    p = sub.add_parser("add", help="save or update a prompt")
+    p.add_argument("--title", required=True)
+    p.add_argument("--category", required=True)
+    p.add_argument("--tags", default="")
+    p.add_argument("--positive", required=True, help="prompt text, or - to read it from stdin")
+    p.add_argument("--negative", default="")
+    p.add_argument("--no-pony", dest="pony", action="store_false", help="don't add Pony score tags")
+    p.add_argument("--realism", action="store_true")
+    p.add_argument("--preset", action="append", default=[], help="apply another preset (repeatable)")
+    p.set_defaults(run=cmd_add)
+
+    p = sub.add_parser("copy", help="copy a prompt to the clipboard")
+    p.add_argument("key", help="title (or id with --id)")
+    p.add_argument("--id", action="store_true")
+    p.add_argument("--part", choices=("positive", "negative", "both"), default="both")
+    add_preset_args(p)
+    p.set_defaults(run=cmd_copy)
+
+    p = sub.add_parser("presets", help="list, create/update or delete formatting presets")
+    p.add_argument("action", choices=("list", "set", "delete"))
+    p.add_argument("name", nargs="?")
+    p.add_argument("--positive-prefix", default="")
+    p.add_argument("--positive-suffix", default="")
+    p.add_argument("--negative-prefix", default="")
+    p.add_argument("--negative-suffix", default="")
+    p.add_argument("--json", action="store_true")
+    p.set_defaults(run=cmd_presets)
+
+    p = sub.add_parser("serve", help="run the local HTTP/JSON prompt service")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--readers", type=int, default=8, help="read connections in the pool (default: %(default)s)")
+
+    vault_io.add_commands(sub)
+    vault_backup.add_commands(sub)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "serve":
+        import vault_server
+        vault_server.run(args.db, args.host, args.port, args.readers)
+        return
+    db = vault_core.open_vault(args.db)
+    try:
+        if args.command in ("import", "export"):
+            vault_io.run_command(db, args)
+        elif args.command in ("backup", "restore"):
+            vault_backup.run_command(db, args)
+        else:
+            args.run(db, args)
+    finally:
+        db.close()
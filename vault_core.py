@@ -0,0 +1,108 @@
+from datetime import datetime
+
+import vault_dedupe
+import vault_history
+import vault_semantic
+from vault_db import DB_PATH, VaultDB
+from vault_presets import PresetEngine
+from vault_random import RandomPicker
+
+# The prompt logic shared by the GUI, the CLI and scripts. Nothing here imports
+# tkinter, so `import vault_core` is cheap and works on any platform.
+
+DEFAULT_CATEGORIES = ["Juggernaut", "Pony", "IPA Subgraph", "Upscale", "Video Gen"]
+
+# Shared so compiled presets and formatted prompts are reused across calls
+presets = PresetEngine()
+
+def open_vault(path=DB_PATH):
+    db = VaultDB(path)
+    db.init_db()
+    return db
+
+def now_stamp():
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+def preset_names(pony=False, realism=False, extra=()):
+    names = (["Pony"] if pony else []) + (["Realism"] if realism else [])
+    return names + [name for name in extra if name not in names]
+
+def format_prompt(db, pos, neg, names, prompt_id=None):
+    # Applies the named presets in order; pass prompt_id to memoize stored prompts
+    return presets.format(db, pos, neg, names, prompt_id)
+
+def categories(db):
+    return sorted(set(db.categories() + DEFAULT_CATEGORIES))
+
+def save_prompt(db, title, cat, tags, pos, neg, names=("Pony",)):
+    # Returns the saved prompt's id; raises ValueError when a required field is empty
+    title, cat, pos = title.strip(), cat.strip(), pos.strip()
+    if not title or not pos or not cat:
+        raise ValueError("Title, Category, and Positive Prompt are required.")
+    pos, neg = format_prompt(db, pos, neg.strip(), names)
+    prompt_id = db.save_prompt(title, cat, tags.strip().lower(), pos, neg, now_stamp())
+    sync_indexes(db)
+    return prompt_id
+
+def delete_prompt(db, prompt_id):
+    db.delete_prompt(prompt_id)
+    sync_indexes(db)
+
+def sync_indexes(db):
+    # Keeps the similarity indexes current after a save or delete, with a
+    # bounded amount of work so a backlog never stalls the caller
+    vault_dedupe.sync(db, limit=vault_dedupe.SAVE_SYNC_LIMIT)
+    vault_semantic.sync(db, limit=vault_semantic.SAVE_SYNC_LIMIT)
+
+def restore_revision(db, revision_id):
+    # Makes an old revision the prompt's current text; the text it replaces is
+    # kept as a revision too, so a restore can be undone the same way
+    old = vault_history.revision(db, revision_id)
+    if old is None:
+        raise ValueError(f"No revision {revision_id}")
+    prompt_id = db.save_prompt(old["title"], old["category"], old["tags"], old["positive"], old["negative"], now_stamp())
+    sync_indexes(db)
+    return prompt_id
+
+def search(db, text, cat="All", limit=None):
+    rows = db.query_prompts("p.id", cat, text.strip(), limit=limit)
+    return [db.prompt_record(row[0]) for row in rows]
+
+def get_prompt(db, key):
+    # `key` is a title, or an id given as an int
+    prompt_id = key if isinstance(key, int) else db.prompt_id(key)
+    return db.prompt_record(prompt_id) if prompt_id is not None else None
+
+# Shared so filter id caches and shuffle decks persist across calls (and server threads)
+picker = RandomPicker()
+
+def random_prompt_id(db, cat="All", text="", mode="uniform"):
+    # mode is one of vault_random.MODES
+    return picker.pick(db, cat, text, mode)
+
+def forget_caches():
+    # After a restore the vault's version counters can repeat with other data
+    picker.clear()
+    presets.clear()
+
+def similar_prompts(db, prompt_id, limit=50, min_similarity=vault_dedupe.SIMILAR_MIN,
+                    sync_limit=vault_dedupe.SAVE_SYNC_LIMIT):
+    # [(record, similarity)] for prompts that read almost the same as prompt_id;
+    # sync_limit as in vault_dedupe.find_similar
+    return [(db.prompt_record(other), score) for other, score in
+            vault_dedupe.find_similar(db, prompt_id, limit, min_similarity, sync_limit=sync_limit)]
+
+def semantic_search(db, text, cat="All", limit=50, search="", catch_up=True):
+    # [(record, score)] for prompts about the same things as `text`, within the
+    # category and keyword/tag search; raises ValueError without numpy.
+    # catch_up=False only reads the index (see vault_semantic.loaded).
+    return [(db.prompt_record(other), score) for other, score in
+            vault_semantic.search(db, [text], limit, cat, search, catch_up=catch_up)[0]]
+
+def more_like(db, prompt_id, limit=50, cat="All", search="", catch_up=True):
+    # Like semantic_search, with a stored prompt as the query
+    return [(db.prompt_record(other), score) for other, score in
+            vault_semantic.more_like(db, prompt_id, limit, cat, search, catch_up=catch_up)]
+
+def touch(db, prompt_id):
+    db.touch(prompt_id, now_stamp())
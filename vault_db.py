@@ -0,0 +1,492 @@
+import sqlite3
+
+from vault_dedupe import init_dedupe
+from vault_history import REVISION_FIELDS, init_history, record_revision
+from vault_presets import init_presets
+from vault_semantic import init_semantic
+from vault_profile import connection_class
+
+DB_PATH = "prompt_vault.db"
+
+# Applied to every connection. WAL lets readers run alongside the writer and
+# NORMAL sync is safe with WAL; cache_size is in KiB when negative.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+    # Saves and imports are UPSERTs, which fire the update triggers. Should a
+    # REPLACE into prompts still happen, this makes it fire the delete triggers
+    # that keep prompts_fts, prompt_stats and the index queues in sync too
+    "PRAGMA recursive_triggers=ON",
+)
+
+PROMPT_FIELDS = ("id", "title", "category", "tags", "positive", "negative", "last_used", "favorite")
+# The columns carried by change events: enough to place and draw a list row
+EVENT_FIELDS = ("title", "category", "favorite", "last_used")
+
+DEFAULT_SETTINGS = (
+    ("selected_theme", "System"),
+    ("last_category", "Pony"),
+    ("window_geometry", "900x1100+300+100"),
+)
+
+# Browse order is keyset-paginated on (last_used, id); these indexes make the
+# ordering index-driven for the All, category and Favorites views.
+INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_prompts_last_used ON prompts(last_used)",
+    "CREATE INDEX IF NOT EXISTS idx_prompts_category_last_used ON prompts(category, last_used)",
+    "CREATE INDEX IF NOT EXISTS idx_prompts_favorite_last_used ON prompts(favorite, last_used)",
+)
+
+# --- Counters ---
+# prompt_stats holds one (total, favorites) row per category, maintained by
+# triggers, so the status bar and category lists never scan prompts.
+def init_stats(cursor):
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='prompt_stats'")
+    exists = cursor.fetchone() is not None
+    if not exists:
+        cursor.execute('''CREATE TABLE prompt_stats
+                          (category TEXT PRIMARY KEY,
+                           total INTEGER NOT NULL DEFAULT 0,
+                           favorites INTEGER NOT NULL DEFAULT 0)''')
+        cursor.execute("""INSERT INTO prompt_stats (category, total, favorites)
+                          SELECT COALESCE(category, ''), COUNT(*), SUM(favorite IS 1) FROM prompts
+                          GROUP BY COALESCE(category, '')""")
+    add = """INSERT INTO prompt_stats (category, total, favorites)
+             VALUES (COALESCE(new.category, ''), 1, new.favorite IS 1)
+             ON CONFLICT(category) DO UPDATE SET total = total + 1, favorites = favorites + excluded.favorites;"""
+    remove = """UPDATE prompt_stats SET total = total - 1, favorites = favorites - (old.favorite IS 1)
+                WHERE category = COALESCE(old.category, '');
+                DELETE FROM prompt_stats WHERE category = COALESCE(old.category, '') AND total <= 0;"""
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS prompt_stats_ai AFTER INSERT ON prompts BEGIN {add} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS prompt_stats_ad AFTER DELETE ON prompts BEGIN {remove} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS prompt_stats_au AFTER UPDATE OF category, favorite ON prompts BEGIN {remove} {add} END")
+
+# --- Change tracking ---
+# vault_meta.membership_version moves on every write that can change which
+# prompts a filter or search matches. last_used touches don't count, so caches
+# keyed on it (random pick id lists) survive the touch that follows each pick.
+def init_meta(cursor):
+    cursor.execute("CREATE TABLE IF NOT EXISTS vault_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL DEFAULT 0)")
+    cursor.execute("INSERT OR IGNORE INTO vault_meta (key, value) VALUES ('membership_version', 0)")
+    bump = "UPDATE vault_meta SET value = value + 1 WHERE key = 'membership_version';"
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS vault_meta_ai AFTER INSERT ON prompts BEGIN {bump} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS vault_meta_ad AFTER DELETE ON prompts BEGIN {bump} END")
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS vault_meta_au
+                       AFTER UPDATE OF title, category, tags, positive, negative, favorite ON prompts BEGIN {bump} END""")
+
+# --- Tags ---
+# prompts.tags stays the editable comma-separated string; tags/prompt_tags hold
+# it normalized (one row per distinct tag, one link per prompt and tag) and are
+# kept in sync by triggers, so imports and other writers need no extra code.
+# tags.uses is the number of prompts carrying the tag.
+def tag_json_sql(ref):
+    # `ref`.tags as a JSON array of raw tags. Triggers can't use CTEs, so the
+    # string is split by turning it into JSON; a string that still isn't valid
+    # JSON yields no tags.
+    text = f"COALESCE({ref}.tags, '')"
+    for char, repl in (("'\\'", "'\\\\'"), ("'\"'", "'\\\"'"), ("char(9)", "' '"), ("char(10)", "' '"), ("char(13)", "' '")):
+        text = f"replace({text}, {char}, {repl})"
+    array = f"""'["' || replace(lower({text}), ',', '","') || '"]'"""
+    return f"CASE WHEN json_valid({array}) THEN {array} ELSE '[]' END"
+
+def tag_list_sql(ref):
+    # Each distinct, trimmed tag of a trigger row (new/old) as `name`
+    return f"(SELECT DISTINCT trim(value) AS name FROM json_each({tag_json_sql(ref)}) WHERE trim(value) <> '')"
+
+def init_tags(cursor):
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='prompt_tags'")
+    exists = cursor.fetchone() is not None
+    if not exists:
+        cursor.execute('''CREATE TABLE IF NOT EXISTS tags
+                          (id INTEGER PRIMARY KEY,
+                           name TEXT UNIQUE NOT NULL,
+                           uses INTEGER NOT NULL DEFAULT 0)''')
+        cursor.execute('''CREATE TABLE prompt_tags
+                          (prompt_id INTEGER NOT NULL,
+                           tag_id INTEGER NOT NULL,
+                           PRIMARY KEY (prompt_id, tag_id)) WITHOUT ROWID''')
+    # prompt -> tags is the primary key; this one serves tag -> prompts
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_prompt_tags_tag ON prompt_tags(tag_id, prompt_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tags_uses ON tags(uses)")
+    add = f"""INSERT INTO tags (name, uses) SELECT name, 1 FROM {tag_list_sql('new')} WHERE true
+              ON CONFLICT(name) DO UPDATE SET uses = uses + 1;
+              INSERT OR IGNORE INTO prompt_tags (prompt_id, tag_id)
+              SELECT new.id, id FROM tags WHERE name IN {tag_list_sql('new')};"""
+    remove = """UPDATE tags SET uses = uses - 1 WHERE id IN (SELECT tag_id FROM prompt_tags WHERE prompt_id = old.id);
+                DELETE FROM tags WHERE uses <= 0 AND id IN (SELECT tag_id FROM prompt_tags WHERE prompt_id = old.id);
+                DELETE FROM prompt_tags WHERE prompt_id = old.id;"""
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS prompt_tags_ai AFTER INSERT ON prompts BEGIN {add} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS prompt_tags_ad AFTER DELETE ON prompts BEGIN {remove} END")
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS prompt_tags_au AFTER UPDATE OF tags ON prompts
+                       WHEN old.tags IS NOT new.tags BEGIN {remove} {add} END""")
+    if not exists:
+        # Migrate the tags of rows saved before the tag tables existed
+        cursor.execute(f"""CREATE TEMP TABLE tag_migration AS
+                           SELECT DISTINCT p.id AS prompt_id, trim(j.value) AS name
+                           FROM prompts p, json_each({tag_json_sql('p')}) j WHERE trim(j.value) <> ''""")
+        cursor.execute("INSERT INTO tags (name, uses) SELECT name, COUNT(*) FROM tag_migration GROUP BY name")
+        cursor.execute("""INSERT INTO prompt_tags (prompt_id, tag_id)
+                          SELECT m.prompt_id, tags.id FROM tag_migration m JOIN tags ON tags.name = m.name""")
+        cursor.execute("DROP TABLE tag_migration")
+
+# --- Full-text search ---
+# prompts_fts is an external-content FTS5 table over prompts, kept in sync by triggers.
+# Column order matters: bm25() weights below follow it.
+FTS_COLUMNS = ("title", "category", "tags", "positive", "negative")
+FTS_WEIGHTS = "10.0, 4.0, 6.0, 1.0, 0.5"
+# tag:name matches one exact tag through prompt_tags; tag:a|b matches either
+TAG_FILTER = "tag"
+
+def init_fts(cursor):
+    try:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='prompts_fts'")
+        exists = cursor.fetchone() is not None
+        if not exists:
+            cursor.execute(f"""CREATE VIRTUAL TABLE prompts_fts USING fts5(
+                               {", ".join(FTS_COLUMNS)},
+                               content='prompts', content_rowid='id',
+                               tokenize="unicode61 remove_diacritics 2 tokenchars '_'")""")
+        cols = ", ".join(FTS_COLUMNS)
+        new_cols = ", ".join(f"new.{c}" for c in FTS_COLUMNS)
+        old_cols = ", ".join(f"old.{c}" for c in FTS_COLUMNS)
+        cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS prompts_fts_ai AFTER INSERT ON prompts BEGIN
+                           INSERT INTO prompts_fts(rowid, {cols}) VALUES (new.id, {new_cols}); END""")
+        cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS prompts_fts_ad AFTER DELETE ON prompts BEGIN
+                           INSERT INTO prompts_fts(prompts_fts, rowid, {cols}) VALUES ('delete', old.id, {old_cols}); END""")
+        cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS prompts_fts_au AFTER UPDATE OF {cols} ON prompts BEGIN
+                           INSERT INTO prompts_fts(prompts_fts, rowid, {cols}) VALUES ('delete', old.id, {old_cols});
+                           INSERT INTO prompts_fts(rowid, {cols}) VALUES (new.id, {new_cols}); END""")
+        if not exists:
+            # Index rows that were saved before the FTS table existed
+            cursor.execute("INSERT INTO prompts_fts(prompts_fts) VALUES ('rebuild')")
+        return True
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5: searches use the LIKE fallback
+        return False
+
+def parse_search(search):
+    # Splits a search string into (column, text, is_phrase) terms.
+    # Supports "quoted phrases", column filters like tags:pony, exact tag filters
+    # like tag:"cat girl" and an explicit trailing *.
+    terms = []
+    i, n = 0, len(search)
+    while i < n:
+        if search[i].isspace():
+            i += 1
+            continue
+        col = None
+        head = search[i:].split(None, 1)[0]
+        if ":" in head:
+            name = head.split(":", 1)[0].lower()
+            if name in FTS_COLUMNS or name == TAG_FILTER:
+                col = name
+                i += len(name) + 1
+        if i < n and search[i] == '"':
+            end = search.find('"', i + 1)
+            if end == -1:
+                end = n
+            text = search[i + 1:end]
+            i = end + 1
+            phrase = True
+        else:
+            end = i
+            while end < n and not search[end].isspace():
+                end += 1
+            text = search[i:end].rstrip("*")
+            i = end
+            phrase = False
+        if text.strip():
+            terms.append((col, text.strip().lower(), phrase))
+    return terms
+
+def fts_match_expr(terms):
+    parts = []
+    for col, text, phrase in terms:
+        quoted = '"' + text.replace('"', '""') + '"'
+        if not phrase:
+            quoted += "*"
+        parts.append(f"{col} : {quoted}" if col else quoted)
+    return " AND ".join(parts)
+
+def build_prompt_query(columns, cat, search, order=True, fts=True, after=None, limit=None, prompt_id=None):
+    query = f"SELECT {columns} FROM prompts p"
+    where = []
+    params = []
+    terms = parse_search(search) if search else []
+    tag_terms = [term for term in terms if term[0] == TAG_FILTER]
+    terms = [term for term in terms if term[0] != TAG_FILTER]
+    use_fts = fts and bool(terms)
+    if use_fts:
+        query += " JOIN prompts_fts ON prompts_fts.rowid = p.id"
+        where.append("prompts_fts MATCH ?")
+        params.append(fts_match_expr(terms))
+    if cat == "Favorites":
+        where.append("p.favorite = 1")
+    elif cat != "All":
+        where.append("p.category = ?")
+        params.append(cat)
+    if terms and not use_fts:
+        for col, text, _ in terms:
+            like = f"%{text}%"
+            if col:
+                where.append(f"lower(p.{col}) LIKE ?")
+                params.append(like)
+            else:
+                where.append("(" + " OR ".join(f"lower(p.{c}) LIKE ?" for c in FTS_COLUMNS) + ")")
+                params += [like] * len(FTS_COLUMNS)
+    for _, text, _ in tag_terms:
+        # Each tag term is an index join: tags.name -> prompt_tags(tag_id, prompt_id) -> p.id
+        names = [name.strip() for name in text.split("|") if name.strip()]
+        where.append("p.id IN (SELECT pt.prompt_id FROM tags t JOIN prompt_tags pt ON pt.tag_id = t.id "
+                     f"WHERE t.name IN ({', '.join('?' * len(names))}))")
+        params += names
+    if prompt_id is not None:
+        # Does this one prompt match? (used to place a just-saved prompt in a search view)
+        where.append("p.id = ?")
+        params.append(prompt_id)
+    if after is not None:
+        # Keyset pagination: continue below the last (last_used, id) already shown
+        where.append("(p.last_used, p.id) < (?, ?)")
+        params += list(after)
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    if order == "stale":
+        # Least recently used first
+        query += " ORDER BY p.last_used ASC, p.id ASC"
+    elif order:
+        if use_fts:
+            query += f" ORDER BY bm25(prompts_fts, {FTS_WEIGHTS}), p.last_used DESC"
+        else:
+            query += " ORDER BY p.last_used DESC, p.id DESC"
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(limit)
+    return query, params
+
+def connect(path=DB_PATH, shared=False):
+    # sqlite3 keeps a per-connection LRU of compiled statements keyed by SQL text,
+    # so every query below uses a constant string with ? parameters.
+    # shared=True allows handing the connection between threads (one at a time).
+    # While profiling is on, connections time their statements (see vault_profile).
+    conn = sqlite3.connect(path, cached_statements=256, check_same_thread=not shared, factory=connection_class())
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+# --- Repository ---
+# One long-lived connection shared by every database helper in the app.
+#
+# Single-prompt writes (save, delete, favorite, touch) call every function in
+# `listeners` with an (op, prompt_id, fields) change event once committed: op is
+# "insert", "update" or "delete", fields maps EVENT_FIELDS to the row's values
+# (the removed row for deletes) and update events add the row as it was under
+# "previous". Saves over an existing title are updates with "edited": True, as
+# their text may have changed. Views patch themselves from these instead of requerying. Bulk
+# writes (imports, restores) and other connections don't emit events.
+class VaultDB:
+    def __init__(self, path=DB_PATH, shared=False):
+        self.path = path
+        self.shared = shared
+        self.conn = connect(path, shared)
+        self.fts_enabled = False
+        self.listeners = []
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def reopen(self):
+        self.close()
+        self.conn = connect(self.path, self.shared)
+        self.init_db()
+
+    def detect_fts(self):
+        # For extra connections to a vault that init_db() has already migrated
+        row = self.conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='prompts_fts'").fetchone()
+        self.fts_enabled = row is not None
+        return self.fts_enabled
+
+    def checkpoint(self):
+        # Fold the WAL back into the main file so it can be copied on its own
+        self.conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def init_db(self):
+        cursor = self.conn.cursor()
+        cursor.execute('''CREATE TABLE IF NOT EXISTS prompts
+                        (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                         title TEXT UNIQUE,
+                         category TEXT,
+                         tags TEXT,
+                         positive TEXT,
+                         negative TEXT,
+                         last_used TEXT,
+                         favorite INTEGER DEFAULT 0)''')
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='settings'")
+        if not cursor.fetchone():
+            cursor.execute('''CREATE TABLE settings (key TEXT PRIMARY KEY, value TEXT)''')
+            cursor.executemany("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", DEFAULT_SETTINGS)
+        # NULL would fall out of the (last_used, id) keyset comparison
+        cursor.execute("UPDATE prompts SET last_used = '' WHERE last_used IS NULL")
+        for index in INDEXES:
+            cursor.execute(index)
+        init_stats(cursor)
+        init_meta(cursor)
+        init_tags(cursor)
+        init_presets(cursor)
+        init_dedupe(cursor)
+        init_history(cursor)
+        init_semantic(cursor)
+        self.fts_enabled = init_fts(cursor)
+        self.conn.commit()
+
+    # --- Settings ---
+    def get_setting(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM settings WHERE key=?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def get_settings(self):
+        return dict(self.conn.execute("SELECT key, value FROM settings"))
+
+    def set_setting(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, value))
+        self.conn.commit()
+
+    # --- Prompts ---
+    def categories(self):
+        return [row[0] for row in self.conn.execute("SELECT category FROM prompt_stats") if row[0]]
+
+    def category_counts(self):
+        return dict(self.conn.execute("SELECT category, total FROM prompt_stats"))
+
+    def query_prompts(self, columns, cat, search, order=True, after=None, limit=None, prompt_id=None):
+        query, params = build_prompt_query(columns, cat, search, order, self.fts_enabled, after, limit, prompt_id)
+        try:
+            return self.conn.execute(query, params).fetchall()
+        except sqlite3.OperationalError:
+            if not self.fts_enabled:
+                raise
+            # Malformed MATCH input (or a missing FTS table): retry this query with LIKE
+            query, params = build_prompt_query(columns, cat, search, order, False, after, limit, prompt_id)
+            return self.conn.execute(query, params).fetchall()
+
+    def matches(self, prompt_id, cat, search):
+        return bool(self.query_prompts("p.id", cat, search, order=False, prompt_id=prompt_id))
+
+    def tag_counts(self, names=None):
+        # (name, uses) for every tag, or for those of `names` that are in use
+        if names is None:
+            return self.conn.execute("SELECT name, uses FROM tags").fetchall()
+        names = list(names)
+        return self.conn.execute(f"SELECT name, uses FROM tags WHERE name IN ({', '.join('?' * len(names))})",
+                                 names).fetchall()
+
+    def tag_facets(self, cat, search, limit=20):
+        # The most used tags among the prompts a filter/search shows, with counts
+        if cat == "All" and not search:
+            return self.conn.execute("SELECT name, uses FROM tags ORDER BY uses DESC, name LIMIT ?", (limit,)).fetchall()
+        for fts in ((True, False) if self.fts_enabled else (False,)):
+            inner, params = build_prompt_query("p.id", cat, search, order=False, fts=fts)
+            try:
+                return self.conn.execute(f"""SELECT t.name, COUNT(*) AS n FROM prompt_tags pt JOIN tags t ON t.id = pt.tag_id
+                                             WHERE pt.prompt_id IN ({inner}) GROUP BY pt.tag_id
+                                             ORDER BY n DESC, t.name LIMIT ?""", params + [limit]).fetchall()
+            except sqlite3.OperationalError:
+                if not fts:
+                    raise
+
+    def count_prompts(self, cat):
+        if cat == "All":
+            return self.counts()[0]
+        if cat == "Favorites":
+            return self.counts()[1]
+        row = self.conn.execute("SELECT total FROM prompt_stats WHERE category = ?", (cat,)).fetchone()
+        return row[0] if row else 0
+
+    def rows_by_ids(self, columns, ids):
+        # Returns rows in the order of `ids`; used to page through ranked search results
+        if not ids:
+            return []
+        marks = ", ".join("?" * len(ids))
+        found = {row[0]: row for row in self.conn.execute(
+            f"SELECT p.id, {columns} FROM prompts p WHERE p.id IN ({marks})", list(ids))}
+        return [found[i][1:] for i in ids if i in found]
+
+    def membership_version(self):
+        return self.conn.execute("SELECT value FROM vault_meta WHERE key = 'membership_version'").fetchone()[0]
+
+    def id_range(self):
+        # Two statements so each uses SQLite's O(log n) min/max shortcut
+        low = self.conn.execute("SELECT MIN(id) FROM prompts").fetchone()[0]
+        high = self.conn.execute("SELECT MAX(id) FROM prompts").fetchone()[0]
+        return low, high
+
+    def counts(self):
+        return self.conn.execute("SELECT COALESCE(SUM(total), 0), COALESCE(SUM(favorites), 0) FROM prompt_stats").fetchone()
+
+    def get_prompt(self, prompt_id):
+        return self.conn.execute("SELECT title, category, tags, positive, negative FROM prompts WHERE id=?",
+                                 (prompt_id,)).fetchone()
+
+    def prompt_id(self, title):
+        row = self.conn.execute("SELECT id FROM prompts WHERE title=?", (title,)).fetchone()
+        return row[0] if row else None
+
+    def prompt_record(self, prompt_id):
+        row = self.conn.execute(f"SELECT {', '.join(PROMPT_FIELDS)} FROM prompts WHERE id=?", (prompt_id,)).fetchone()
+        return dict(zip(PROMPT_FIELDS, row)) if row else None
+
+    def save_prompt(self, title, cat, tags, pos, neg, now):
+        # An existing title is updated in place, keeping its id and favorite;
+        # the text it had goes to its revision history
+        with self.conn:
+            old = self.conn.execute(f"SELECT id, {', '.join(REVISION_FIELDS)} FROM prompts WHERE title=?",
+                                    (title,)).fetchone()
+            previous = self.event_fields(old[0]) if old and self.listeners else None
+            cursor = self.conn.execute("""INSERT INTO prompts (title, category, tags, positive, negative, last_used)
+                                          VALUES (?, ?, ?, ?, ?, ?)
+                                          ON CONFLICT(title) DO UPDATE SET category = excluded.category,
+                                          tags = excluded.tags, positive = excluded.positive,
+                                          negative = excluded.negative, last_used = excluded.last_used""",
+                                       (title, cat, tags, pos, neg, now))
+            if old:
+                record_revision(self.conn, old[0], old[1:], (cat, tags, pos, neg), now)
+        prompt_id = old[0] if old else cursor.lastrowid
+        if previous:
+            self.emit("update", prompt_id, dict(self.event_fields(prompt_id), previous=previous, edited=True))
+        elif self.listeners:
+            self.emit("insert", prompt_id, self.event_fields(prompt_id))
+        return prompt_id
+
+    def delete_prompt(self, prompt_id):
+        fields = self.event_fields(prompt_id) if self.listeners else None
+        self.conn.execute("DELETE FROM prompts WHERE id=?", (prompt_id,))
+        self.conn.commit()
+        if fields:
+            self.emit("delete", prompt_id, fields)
+
+    def toggle_favorite(self, prompt_id):
+        self.update_prompt(prompt_id, "UPDATE prompts SET favorite = 1 - favorite WHERE id=?", (prompt_id,))
+
+    def touch(self, prompt_id, now):
+        self.update_prompt(prompt_id, "UPDATE prompts SET last_used=? WHERE id=?", (now, prompt_id))
+
+    def update_prompt(self, prompt_id, sql, params):
+        previous = self.event_fields(prompt_id) if self.listeners else None
+        self.conn.execute(sql, params)
+        self.conn.commit()
+        if previous:
+            self.emit("update", prompt_id, dict(self.event_fields(prompt_id), previous=previous))
+
+    # --- Change events ---
+    def event_fields(self, prompt_id):
+        row = self.conn.execute(f"SELECT {', '.join(EVENT_FIELDS)} FROM prompts WHERE id=?", (prompt_id,)).fetchone()
+        return dict(zip(EVENT_FIELDS, row)) if row else None
+
+    def emit(self, op, prompt_id, fields):
+        for listener in self.listeners:
+            listener(op, prompt_id, fields)
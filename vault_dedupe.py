@@ -0,0 +1,247 @@
+import hashlib
+import zlib
+from array import array
+from operator import eq
+
+from vault_presets import split_tags, tag_key
+
+# --- Near-duplicate index ---
+# Every prompt gets a MinHash signature over its tag shingles: each tag is
+# normalized with vault_presets.tag_key, so tag order, emphasis, weights and
+# LoRA strengths don't matter, and preset tags (score_9, ...) are left out
+# because nearly every prompt shares them. Signatures are cut into LSH bands;
+# prompts sharing any band land in the same bucket of minhash_bands, so finding
+# candidates is an index lookup rather than a pairwise compare.
+#
+# The signature is one-permutation MinHash: each shingle is hashed once into
+# one of SIG_BINS bins, and empty bins borrow from the next filled one. That
+# keeps indexing at one hash per shingle, which matters in pure Python.
+#
+# Triggers queue changed prompts in minhash_dirty; sync() folds the queue into
+# the index. Saves sync right away, and any other writer (imports, the server)
+# is caught up by find_similar() and duplicate_report(): by SAVE_SYNC_LIMIT
+# prompts per call unless the caller, running off the UI thread, asks for all.
+
+SIG_BINS = 64
+BANDS = 16
+ROWS = SIG_BINS // BANDS
+VALUE_BITS = 24
+SHINGLE_WORDS = 3
+SYNC_BATCH = 2000
+# A save indexes at most this many queued prompts so it never stalls on a backlog
+SAVE_SYNC_LIMIT = 200
+SIMILAR_MIN = 0.5
+DUPLICATE_MIN = 0.8
+# Buckets with more distinct signatures than this come from a band too common
+# to mean anything; true near-duplicates share several other bands anyway
+MAX_BUCKET_SIGS = 32
+
+def init_dedupe(cursor):
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='minhash_dirty'")
+    exists = cursor.fetchone() is not None
+    cursor.execute("CREATE TABLE IF NOT EXISTS prompt_minhash (prompt_id INTEGER PRIMARY KEY, sig BLOB NOT NULL)")
+    cursor.execute('''CREATE TABLE IF NOT EXISTS minhash_bands
+                      (band_key INTEGER NOT NULL,
+                       prompt_id INTEGER NOT NULL,
+                       PRIMARY KEY (band_key, prompt_id)) WITHOUT ROWID''')
+    cursor.execute("CREATE TABLE IF NOT EXISTS minhash_dirty (prompt_id INTEGER PRIMARY KEY)")
+    # Not INSERT OR IGNORE: inside a trigger that gives way to the outer
+    # statement's conflict handling, so the UPSERT a save does would fail on an
+    # id that's already queued. Triggers created that way (when saves were
+    # REPLACEs, which it suited) are replaced.
+    for (name,) in cursor.execute("""SELECT name FROM sqlite_master WHERE type='trigger'
+                                     AND name LIKE 'minhash%' AND sql LIKE '%OR IGNORE%'""").fetchall():
+        cursor.execute(f"DROP TRIGGER {name}")
+    queue = "INSERT INTO minhash_dirty (prompt_id) VALUES ({}.id) ON CONFLICT(prompt_id) DO NOTHING;"
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS minhash_ai AFTER INSERT ON prompts BEGIN {queue.format('new')} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS minhash_ad AFTER DELETE ON prompts BEGIN {queue.format('old')} END")
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS minhash_au AFTER UPDATE OF positive, negative ON prompts
+                       BEGIN {queue.format('new')} END""")
+    if not exists:
+        # Index prompts saved before the index existed (done by the first sync)
+        cursor.execute("INSERT INTO minhash_dirty (prompt_id) SELECT id FROM prompts")
+
+# --- Signatures ---
+def shingles(pos, neg, ignore=frozenset()):
+    # Tags are the shingles; long free-text tags contribute their word 3-grams
+    found = set()
+    for prefix, text in (("", pos), ("-", neg)):
+        for tag in split_tags(text or ""):
+            key = tag_key(tag)
+            if key in ignore:
+                continue
+            words = key.split()
+            if len(words) <= SHINGLE_WORDS:
+                found.add(prefix + key)
+            else:
+                found.update(prefix + " ".join(words[i:i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1))
+    return found
+
+def signature(items):
+    # Returns an array('I') of SIG_BINS values, or None for an empty prompt
+    if not items:
+        return None
+    mask = (1 << VALUE_BITS) - 1
+    bins = [None] * SIG_BINS
+    for item in items:
+        h = int.from_bytes(hashlib.blake2b(item.encode(), digest_size=8).digest(), "little")
+        slot, value = h % SIG_BINS, (h // SIG_BINS) & mask
+        if bins[slot] is None or value < bins[slot]:
+            bins[slot] = value
+    # Densify: an empty bin takes the next filled bin's value, tagged with the distance
+    sig = array("I", bytes(4 * SIG_BINS))
+    filled = value = None
+    for i in range(2 * SIG_BINS - 1, -1, -1):
+        if bins[i % SIG_BINS] is not None:
+            filled, value = i, bins[i % SIG_BINS]
+        if i < SIG_BINS:
+            sig[i] = ((filled - i) << VALUE_BITS) | value
+    return sig
+
+def band_keys(sig):
+    # Band b takes every BANDS-th bin starting at b: neighbouring bins can share
+    # one borrowed value after densification, so they'd make weak bands
+    keys = []
+    for band in range(BANDS):
+        keys.append(zlib.crc32(sig[band::BANDS].tobytes(), band))
+    return keys
+
+def similarity(a, b):
+    # Estimated Jaccard similarity of the two prompts' shingle sets
+    return sum(map(eq, a, b)) / SIG_BINS
+
+def load_sig(blob):
+    sig = array("I")
+    sig.frombytes(blob)
+    return sig
+
+def preset_tags(db):
+    ignore = set()
+    for row in db.conn.execute("SELECT positive_prefix, positive_suffix, negative_prefix, negative_suffix FROM presets"):
+        for text in row:
+            ignore.update(tag_key(tag) for tag in split_tags(text))
+    return frozenset(ignore)
+
+# --- Index maintenance ---
+def sync(db, limit=None, progress=None):
+    # Indexes queued prompts; returns how many were processed
+    conn = db.conn
+    ignore = preset_tags(db)
+    done = 0
+    while limit is None or done < limit:
+        batch = SYNC_BATCH if limit is None else min(SYNC_BATCH, limit - done)
+        ids = [row[0] for row in conn.execute("SELECT prompt_id FROM minhash_dirty LIMIT ?", (batch,))]
+        if not ids:
+            break
+        index_prompts(db, ids, ignore)
+        done += len(ids)
+        if progress:
+            progress(done)
+    return done
+
+def index_prompts(db, ids, ignore):
+    # (Re)indexes the given queued prompts and takes them off the queue
+    conn = db.conn
+    marks = ", ".join("?" * len(ids))
+    old = conn.execute(f"SELECT prompt_id, sig FROM prompt_minhash WHERE prompt_id IN ({marks})", ids).fetchall()
+    rows = conn.execute(f"SELECT id, positive, negative FROM prompts WHERE id IN ({marks})", ids).fetchall()
+    sigs, bands = [], []
+    for prompt_id, pos, neg in rows:
+        sig = signature(shingles(pos, neg, ignore))
+        if sig is not None:
+            sigs.append((prompt_id, sig.tobytes()))
+            bands += [(key, prompt_id) for key in band_keys(sig)]
+    with conn:
+        conn.executemany("DELETE FROM minhash_bands WHERE band_key = ? AND prompt_id = ?",
+                         [(key, prompt_id) for prompt_id, blob in old for key in band_keys(load_sig(blob))])
+        conn.execute(f"DELETE FROM prompt_minhash WHERE prompt_id IN ({marks})", ids)
+        conn.executemany("INSERT INTO prompt_minhash (prompt_id, sig) VALUES (?, ?)", sigs)
+        conn.executemany("INSERT OR IGNORE INTO minhash_bands (band_key, prompt_id) VALUES (?, ?)", bands)
+        conn.execute(f"DELETE FROM minhash_dirty WHERE prompt_id IN ({marks})", ids)
+
+def pending(db):
+    return db.conn.execute("SELECT COUNT(*) FROM minhash_dirty").fetchone()[0]
+
+# --- Queries ---
+def find_similar(db, prompt_id, limit=50, min_similarity=SIMILAR_MIN, progress=None, sync_limit=SAVE_SYNC_LIMIT):
+    # [(id, similarity)] most similar first, not including the prompt itself.
+    # Indexes at most sync_limit queued prompts first (None: the whole queue,
+    # for callers off the UI thread); the prompt itself is always indexed.
+    if db.conn.execute("SELECT 1 FROM minhash_dirty WHERE prompt_id = ?", (prompt_id,)).fetchone():
+        index_prompts(db, [prompt_id], preset_tags(db))
+    sync(db, sync_limit, progress)
+    row = db.conn.execute("SELECT sig FROM prompt_minhash WHERE prompt_id = ?", (prompt_id,)).fetchone()
+    if row is None:
+        return []
+    sig = load_sig(row[0])
+    keys = band_keys(sig)
+    found = db.conn.execute(f"""SELECT m.prompt_id, m.sig FROM prompt_minhash m WHERE m.prompt_id IN
+                                (SELECT prompt_id FROM minhash_bands WHERE band_key IN ({', '.join('?' * len(keys))}))""",
+                            keys).fetchall()
+    scored = [(other, similarity(sig, load_sig(blob))) for other, blob in found if other != prompt_id]
+    scored = [item for item in scored if item[1] >= min_similarity]
+    scored.sort(key=lambda item: (-item[1], item[0]))
+    return scored[:limit]
+
+def duplicate_report(db, min_similarity=DUPLICATE_MIN, progress=None, sync_limit=SAVE_SYNC_LIMIT):
+    # Groups of near-duplicate prompt ids, biggest first. Candidates come from
+    # shared LSH buckets, are confirmed by signature similarity and merged with
+    # union-find, so the work grows with the number of duplicates, not n².
+    # sync_limit works as in find_similar.
+    sync(db, sync_limit, progress)
+    parent = {}
+
+    def find(x):
+        root = x
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while x != root:
+            parent[x], x = root, parent.get(x, x)
+        return root
+
+    def union(a, b):
+        ra, rb = find(a), find(b)
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+
+    sigs = {prompt_id: blob for prompt_id, blob in db.conn.execute("SELECT prompt_id, sig FROM prompt_minhash")}
+    buckets = db.conn.execute("""SELECT group_concat(prompt_id) FROM minhash_bands GROUP BY band_key
+                                 HAVING COUNT(*) > 1""")
+    for (members,) in buckets:
+        # Identical signatures join without comparing; the rest are compared
+        # pairwise unless the band is too common to say anything
+        distinct = {}
+        for prompt_id in map(int, members.split(",")):
+            first = distinct.setdefault(sigs[prompt_id], prompt_id)
+            if first != prompt_id:
+                union(first, prompt_id)
+        if len(distinct) > MAX_BUCKET_SIGS:
+            continue
+        ids = list(distinct.values())
+        for i, a in enumerate(ids):
+            sa = load_sig(sigs[a])
+            for b in ids[i + 1:]:
+                if find(a) != find(b) and similarity(sa, load_sig(sigs[b])) >= min_similarity:
+                    union(a, b)
+    groups = {}
+    for prompt_id in {x for pair in parent.items() for x in pair}:
+        groups.setdefault(find(prompt_id), []).append(prompt_id)
+    result = [sorted(ids) for ids in groups.values() if len(ids) > 1]
+    result.sort(key=lambda ids: (-len(ids), ids[0]))
+    return result
+
+def describe_groups(db, groups):
+    # Attaches titles/categories and each member's similarity to the group's first prompt
+    report = []
+    for ids in groups:
+        first = load_sig(db.conn.execute("SELECT sig FROM prompt_minhash WHERE prompt_id = ?", (ids[0],)).fetchone()[0])
+        members = []
+        for prompt_id in ids:
+            row = db.conn.execute("SELECT title, category FROM prompts WHERE id = ?", (prompt_id,)).fetchone()
+            blob = db.conn.execute("SELECT sig FROM prompt_minhash WHERE prompt_id = ?", (prompt_id,)).fetchone()
+            if row and blob:
+                members.append({"id": prompt_id, "title": row[0], "category": row[1],
+                                "similarity": round(similarity(first, load_sig(blob[0])), 2)})
+        if len(members) > 1:
+            report.append(members)
+    return report
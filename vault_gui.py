@@ -0,0 +1,1075 @@
+import tkinter as tk
+from tkinter import messagebox, ttk, scrolledtext, filedialog, Menu
+import sqlite3
+import pyperclip
+from datetime import datetime
+import os
+import threading
+import time
+from array import array
+import vault_backup
+import vault_core
+import vault_dedupe
+import vault_history
+import vault_presets
+import vault_random
+import vault_semantic
+import vault_tags
+from vault_db import VaultDB
+from vault_profile import profiler
+from vault_search import SearchScheduler
+from vault_listview import (LIST_COLUMNS, PAGE_SIZE, SEMANTIC_LIMIT, ListPage, PromptList, SemanticSearch, Totals,
+                            fetch_facets, fetch_first_page)
+import vault_io
+
+# --- Theme Configurations ---
+THEMES = {
+    "Dark": {
+        "BG_COLOR": "#121212",
+        "FRAME_BG": "#1e1e1e",
+        "TEXT_COLOR": "#ffffff",
+        "ACCENT_COLOR": "#333333",
+        "SELECT_BG": "#1976d2"
+    },
+    "Light": {
+        "BG_COLOR": "#f0f0f0",
+        "FRAME_BG": "#ffffff",
+        "TEXT_COLOR": "#000000",
+        "ACCENT_COLOR": "#e0e0e0",
+        "SELECT_BG": "#2196f3"
+    }
+}
+
+# Options each themed widget class gets. At startup they go into Tk's option
+# database before any widget exists, so the window is built in its colors;
+# switching themes later reconfigures a cached list of the themed widgets.
+THEME_ROLES = {
+    "Label": lambda c: {"background": c["FRAME_BG"], "foreground": c["TEXT_COLOR"]},
+    "Entry": lambda c: {"background": c["ACCENT_COLOR"], "foreground": c["TEXT_COLOR"],
+                        "insertbackground": c["TEXT_COLOR"]},
+    "Text": lambda c: {"background": c["ACCENT_COLOR"], "foreground": c["TEXT_COLOR"],
+                       "insertbackground": c["TEXT_COLOR"]},
+    "Checkbutton": lambda c: {"background": c["FRAME_BG"], "foreground": c["TEXT_COLOR"],
+                              "selectcolor": c["ACCENT_COLOR"], "activebackground": c["FRAME_BG"]},
+    "Frame": lambda c: {"background": c["FRAME_BG"]},
+    "Labelframe": lambda c: {"background": c["FRAME_BG"], "foreground": c["TEXT_COLOR"]},
+}
+# Option database names of the options above that aren't all lowercase there
+OPTION_NAMES = {"insertbackground": "insertBackground", "selectcolor": "selectColor",
+                "activebackground": "activeBackground"}
+themed_widgets = None
+theme_styles = {}
+
+def detect_windows_dark_mode():
+    try:
+        import winreg
+        registry = winreg.ConnectRegistry(None, winreg.HKEY_CURRENT_USER)
+        key = winreg.OpenKey(registry, r"Software\Microsoft\Windows\CurrentVersion\Themes\Personalize")
+        value, _ = winreg.QueryValueEx(key, "AppsUseLightTheme")
+        return value == 0
+    except:
+        return True
+
+def effective_theme(theme_name):
+    return "Dark" if (theme_name == "System" and detect_windows_dark_mode()) or theme_name == "Dark" else "Light"
+
+@profiler.timed("theme")
+def set_theme(theme_name):
+    set_setting("selected_theme", theme_name)
+    effective = effective_theme(theme_name)
+    colors = THEMES[effective]
+    set_theme_defaults(colors)
+    for widget, options in theme_style_map(effective):
+        try:
+            widget.configure(**options)
+        except tk.TclError:
+            pass
+    style_fixed_widgets(colors)
+
+    # Force layout refresh after theme change
+    root.update_idletasks()
+    current_geom = root.geometry()
+    root.geometry(f"{root.winfo_width()+1}x{root.winfo_height()}")
+    root.geometry(current_geom)
+
+def set_theme_defaults(colors):
+    # Styles widgets created from now on (the main window at startup, dialogs later)
+    for cls, role in THEME_ROLES.items():
+        for option, value in role(colors).items():
+            root.option_add(f"*{cls}.{OPTION_NAMES.get(option, option)}", value)
+
+def theme_style_map(effective):
+    # [(widget, options)] for one theme; the main window's widgets are collected once
+    global themed_widgets
+    if themed_widgets is None:
+        themed_widgets = []
+        pending = [root]
+        while pending:
+            widget = pending.pop()
+            if widget.winfo_class() in THEME_ROLES:
+                themed_widgets.append(widget)
+            pending += [child for child in widget.winfo_children() if child.winfo_class() != "Toplevel"]
+    if effective not in theme_styles:
+        colors = THEMES[effective]
+        roles = {cls: role(colors) for cls, role in THEME_ROLES.items()}
+        theme_styles[effective] = [(widget, roles[widget.winfo_class()]) for widget in themed_widgets]
+    return theme_styles[effective]
+
+def style_fixed_widgets(colors):
+    # Widgets with colors of their own, outside the option database
+    root.configure(background=colors["BG_COLOR"])
+    listbox.configure(background=colors["ACCENT_COLOR"], foreground=colors["TEXT_COLOR"],
+                      selectbackground=colors["SELECT_BG"])
+    status_frame.configure(background="#2d2d2d")
+    status_label.configure(background="#2d2d2d", foreground="#aaaaaa")
+
+    style.configure("TCombobox", fieldbackground=colors["ACCENT_COLOR"],
+                    background=colors["ACCENT_COLOR"], foreground=colors["TEXT_COLOR"],
+                    arrowcolor=colors["TEXT_COLOR"])
+
+# --- Database ---
+db = VaultDB()
+
+def init_db():
+    db.init_db()
+
+# All settings are read in one query at startup; the window is their only
+# writer while it's open, so writes go through this copy
+settings = {}
+
+def load_settings():
+    settings.clear()
+    settings.update(db.get_settings())
+
+def get_setting(key, default=None):
+    return settings.get(key, default)
+
+def set_setting(key, value):
+    settings[key] = value
+    db.set_setting(key, value)
+
+def get_unique_categories():
+    try:
+        return vault_core.categories(db)
+    except sqlite3.Error:
+        return sorted(vault_core.DEFAULT_CATEGORIES)
+
+def refresh_dropdowns():
+    new_cats = get_unique_categories()
+    set_category_choices(new_cats)
+    last_cat = get_setting("last_category")
+    if last_cat and last_cat in new_cats:
+        cat_combo.set(last_cat)
+
+def set_category_choices(new_cats):
+    cat_combo['values'] = new_cats
+    f_menu['values'] = ["All", "Favorites"] + new_cats
+
+def active_presets():
+    return [name for name, var in preset_vars.items() if var.get()]
+
+def apply_pony_formatting(pos, neg):
+    return vault_core.format_prompt(db, pos, neg, active_presets())
+
+def refresh_preset_menu():
+    preset_menu.delete(0, tk.END)
+    for preset in vault_presets.list_presets(db):
+        if preset["name"] not in preset_vars:
+            preset_vars[preset["name"]] = tk.BooleanVar()
+        preset_menu.add_checkbutton(label=preset["name"], variable=preset_vars[preset["name"]])
+
+# --- Prompt Functions ---
+def save_prompt():
+    title = title_entry.get().strip()
+    cat = cat_combo.get().strip()
+    old_id = db.prompt_id(title)
+    old_tags = db.prompt_record(old_id)["tags"] if old_id else ""
+    try:
+        with profiler.operation("save"):
+            vault_core.save_prompt(db, title, cat, tags_entry.get(), pos_entry.get("1.0", tk.END),
+                                   neg_entry.get("1.0", tk.END), active_presets())
+    except ValueError as e:
+        messagebox.showwarning("Input Error", str(e))
+        return
+    set_setting("last_category", cat)
+    update_tag_trie(old_tags, tags_entry.get())
+    messagebox.showinfo("Success", f"'{title}' saved/updated!")
+    clear_fields()
+
+def clear_fields():
+    title_entry.delete(0, tk.END)
+    tags_entry.delete(0, tk.END)
+    pos_entry.delete("1.0", tk.END)
+    neg_entry.delete("1.0", tk.END)
+
+def fill_fields(row):
+    clear_fields()
+    title_entry.insert(0, row[0])
+    cat_combo.set(row[1])
+    tags_entry.insert(0, row[2])
+    pos_entry.insert("1.0", row[3])
+    neg_entry.insert("1.0", row[4])
+
+@profiler.timed("load_selected")
+def load_selected(event=None):
+    prompt_id = prompt_list.selected_id()
+    if prompt_id is None:
+        return
+    row = db.get_prompt(prompt_id)
+    if row:
+        fill_fields(row)
+
+def copy_positive():
+    pos, _ = apply_pony_formatting(pos_entry.get("1.0", tk.END).strip(), "")
+    pyperclip.copy(pos)
+    messagebox.showinfo("Copied", "Positive prompt copied!")
+
+def copy_negative():
+    _, neg = apply_pony_formatting("", neg_entry.get("1.0", tk.END).strip())
+    pyperclip.copy(neg)
+    messagebox.showinfo("Copied", "Negative prompt copied!")
+
+def copy_both():
+    pos, neg = apply_pony_formatting(pos_entry.get("1.0", tk.END).strip(), neg_entry.get("1.0", tk.END).strip())
+    pyperclip.copy(f"{pos}\n\nNegative Prompt:\n{neg}")
+    messagebox.showinfo("Copied", "Both prompts copied!")
+
+def add_lora_syntax():
+    name = title_entry.get().strip()
+    if not name:
+        messagebox.showwarning("Error", "Enter a LoRA name in Title first.")
+        return
+    pos_entry.insert(tk.INSERT, f"<lora:{name}:1.0>")
+
+def delete_prompt():
+    prompt_id = prompt_list.selected_id()
+    if prompt_id is None:
+        return
+    row = db.get_prompt(prompt_id)
+    if row and messagebox.askyesno("Delete", f"Delete '{row[0]}'?"):
+        with profiler.operation("delete"):
+            vault_core.delete_prompt(db, prompt_id)
+        update_tag_trie(row[2], "")
+
+@profiler.timed("favorite")
+def toggle_favorite():
+    prompt_id = prompt_list.selected_id()
+    if prompt_id is not None:
+        db.toggle_favorite(prompt_id)
+
+def random_prompt():
+    with profiler.operation("random"):
+        prompt_id = vault_core.random_prompt_id(db, filter_var.get(), current_search(), random_mode_var.get())
+        row = load_selected_id(prompt_id) if prompt_id is not None else None
+    if prompt_id is None:
+        messagebox.showinfo("Random", "No prompts match current filter.")
+    elif row:
+        messagebox.showinfo("Random Prompt", f"Loaded: {row[0]}")
+
+def load_selected_id(prompt_id):
+    row = db.get_prompt(prompt_id)
+    vault_core.touch(db, prompt_id)
+    if row:
+        fill_fields(row)
+    return row
+
+BACKUP_TYPES = [("Database", "*.db"), ("Compressed database", "*.db.gz")]
+
+def percent(label, report):
+    return lambda done, total: report(f"{label}... {done * 100 // max(total, 1)}%")
+
+def backup_database():
+    name = f"prompt_vault_backup_{datetime.now().strftime('%Y-%m-%d')}.db"
+    file = filedialog.asksaveasfilename(initialfile=name, defaultextension=".db", filetypes=BACKUP_TYPES)
+    if not file:
+        return
+
+    def work(job_db, report):
+        return vault_backup.backup_database(job_db, file, progress=percent("Backing up", report))
+
+    def done(result, error):
+        if error:
+            messagebox.showerror("Error", f"Backup failed: {error}")
+        else:
+            messagebox.showinfo("Backup", "Database backed up successfully!")
+        update_status()
+
+    run_in_background(work, done, "backup")
+
+def restore_database():
+    file = filedialog.askopenfilename(filetypes=[("Backups", "*.db *.db.gz")] + BACKUP_TYPES)
+    if not file or not messagebox.askyesno("Restore", "This will overwrite your current database. Continue?"):
+        return
+
+    def work(job_db, report):
+        vault_backup.restore_database(job_db, file, percent("Checking and restoring", report))
+
+    def done(result, error):
+        if error:
+            messagebox.showerror("Error", f"Restore failed: {error}")
+            update_status()
+            return
+        # Same file, new contents: pick up its schema state and drop cached results
+        db.reopen()
+        searcher.reset()
+        facet_searcher.reset()
+        vault_core.forget_caches()
+        load_settings()
+        messagebox.showinfo("Restore", "Database restored! Reloading...")
+        totals.reload(db)
+        load_prompts()
+        refresh_dropdowns()
+        refresh_preset_menu()
+        rebuild_tag_trie()
+
+    run_in_background(work, done, "restore")
+
+AUTO_BACKUP_CHECK_MS = 60000
+AUTO_BACKUP_CHOICES = (("0", "Off"), ("1", "Every Hour"), ("24", "Daily"), ("168", "Weekly"))
+auto_backup_busy = False
+
+def check_auto_backup():
+    root.after(AUTO_BACKUP_CHECK_MS, check_auto_backup)
+    start_auto_backup()
+
+def start_auto_backup():
+    # Runs on a worker with small paced steps so typing and searching stay responsive
+    global auto_backup_busy
+    if auto_backup_busy or not vault_backup.auto_backup_due(db):
+        return
+    auto_backup_busy = True
+
+    def work(job_db, report):
+        return vault_backup.run_auto_backup(job_db, percent("Automatic backup", report), pause=0.002)
+
+    def done(result, error):
+        global auto_backup_busy
+        auto_backup_busy = False
+        update_status()
+        if error:
+            status_label.config(text=f"Automatic backup failed: {error}")
+
+    run_in_background(work, done, "auto_backup")
+
+def set_auto_backup():
+    set_setting("auto_backup_hours", auto_backup_var.get())
+    start_auto_backup()
+
+# --- Import / Export ---
+def run_in_background(work, on_done, name):
+    # work(job_db, report) runs on a worker thread with its own connection;
+    # report(text) shows progress in the status bar, on_done(result, error) runs on the Tk thread.
+    # `name` is the operation the work is profiled as.
+    state = {"message": None, "done": False, "result": None, "error": None}
+
+    def target():
+        job_db = VaultDB(db.path)
+        try:
+            job_db.init_db()
+            with profiler.operation(name):
+                state["result"] = work(job_db, lambda text: state.__setitem__("message", text))
+        except Exception as e:
+            state["error"] = e
+        finally:
+            job_db.close()
+            state["done"] = True
+
+    def poll():
+        if state["message"]:
+            status_label.config(text=state["message"])
+        if state["done"]:
+            on_done(state["result"], state["error"])
+        else:
+            root.after(100, poll)
+
+    threading.Thread(target=target, daemon=True).start()
+    root.after(100, poll)
+
+def import_file(fmt=None):
+    types = [("Prompt files", "*.jsonl *.json *.csv"), ("All files", "*.*")]
+    if fmt == "a1111":
+        types = [("A1111 styles", "*.csv")]
+    elif fmt == "comfy":
+        types = [("ComfyUI styles", "*.json")]
+    file = filedialog.askopenfilename(filetypes=types)
+    if not file:
+        return
+    answer = messagebox.askyesnocancel("Import", "Replace existing prompts that have the same title?\n\n"
+                                       "Yes = replace, No = keep existing and skip duplicates")
+    if answer is None:
+        return
+    policy = "replace" if answer else "skip"
+
+    def work(job_db, report):
+        with vault_io.open_for(file, "r") as f:
+            return vault_io.import_prompts(job_db, f, fmt or vault_io.guess_format(file), policy,
+                                           lambda n: report(f"Importing... {n} prompts read"))
+
+    def done(result, error):
+        if error:
+            messagebox.showerror("Error", f"Import failed: {error}")
+        else:
+            messagebox.showinfo("Import", f"Imported {result[1]} of {result[0]} prompts.")
+        totals.reload(db)
+        load_prompts()
+        refresh_dropdowns()
+        rebuild_tag_trie()
+
+    run_in_background(work, done, "import")
+
+def export_file(fmt=None):
+    name = f"prompt_vault_export_{datetime.now().strftime('%Y-%m-%d')}"
+    types = [("JSON Lines", "*.jsonl"), ("JSON", "*.json"), ("CSV", "*.csv"), ("Text", "*.txt")]
+    if fmt == "a1111":
+        types = [("A1111 styles", "*.csv")]
+    elif fmt == "comfy":
+        types = [("ComfyUI styles", "*.json")]
+    file = filedialog.asksaveasfilename(initialfile=name, defaultextension=types[0][1][1:], filetypes=types)
+    if not file:
+        return
+    # Exports what the list currently shows
+    cat, search = filter_var.get(), current_search()
+
+    def work(job_db, report):
+        with vault_io.open_for(file, "w") as f:
+            return vault_io.export_prompts(job_db, f, fmt or vault_io.guess_format(file), cat, search,
+                                           lambda n: report(f"Exporting... {n} prompts written"))
+
+    def done(result, error):
+        if error:
+            messagebox.showerror("Error", f"Export failed: {error}")
+        else:
+            messagebox.showinfo("Export", f"Exported {result} prompts.")
+        update_status()
+
+    run_in_background(work, done, "export")
+
+def load_prompts(event=None, delay_ms=0):
+    # Queries run on the search worker; show_prompts receives the newest result
+    searcher.schedule(filter_var.get(), list_search(), delay_ms)
+    facet_searcher.schedule(filter_var.get(), facet_search(), delay_ms)
+
+def on_search_typed(*args):
+    # Debounced: a burst of keystrokes becomes one query
+    searcher.schedule(filter_var.get(), list_search())
+    facet_searcher.schedule(filter_var.get(), facet_search())
+
+def current_search():
+    # The search text plus the tag filter, as one search string
+    return vault_tags.with_tags(search_var.get(), tag_filter_var.get())
+
+def list_search():
+    # What the list shows: the keyword search, or with Semantic on the search
+    # text ranked by meaning among the prompts matching the tag filter
+    text = search_var.get().strip()
+    if semantic_var.get() and text and not semantic_building:
+        return SemanticSearch(text, vault_tags.with_tags("", tag_filter_var.get()))
+    return current_search()
+
+def facet_search():
+    search = list_search()
+    return search.filter if isinstance(search, SemanticSearch) else search
+
+def fetch_prompts(job_db, cat, search):
+    # Runs on the search worker
+    name = "semantic_search" if isinstance(search, SemanticSearch) else "search" if search else "load_prompts"
+    with profiler.operation(name):
+        return fetch_first_page(job_db, cat, search)
+
+def fetch_tag_facets(job_db, cat, search):
+    with profiler.operation("facets"):
+        return fetch_facets(job_db, cat, search)
+
+@profiler.timed("show_prompts")
+def show_prompts(page):
+    prompt_list.show(page)
+    update_status()
+    if not started:
+        startup_done()
+
+def show_search_error(error):
+    status_label.config(text=f"Search failed: {error}")
+    if not started:
+        startup_done()
+
+def on_change(op, prompt_id, fields):
+    # VaultDB change event: patch the list, counters and categories in place
+    categories = totals.categories()
+    totals.apply(op, fields)
+    page = prompt_list.page
+    prompt_list.apply_change(op, prompt_id, fields, lambda: db.matches(prompt_id, page.cat, page.search))
+    if totals.categories() != categories:
+        set_category_choices(sorted(totals.categories() | set(vault_core.DEFAULT_CATEGORIES)))
+    if op != "update":
+        # Tag counts are computed off the Tk thread and don't touch the list
+        facet_searcher.schedule(filter_var.get(), facet_search(), 0)
+    update_status()
+
+def show_facets(facets):
+    facet_combo["values"] = [f"{name} ({count})" for name, count in facets]
+
+# --- Tags ---
+# Empty until startup stage 2 builds it
+tag_trie = vault_tags.TagTrie()
+
+def rebuild_tag_trie():
+    global tag_trie
+    tag_trie = vault_tags.TagTrie(db.tag_counts())
+
+def update_tag_trie(old_tags, new_tags):
+    # Brings the counts of the tags a save, delete or revision restore added or
+    # dropped in line with the tags table. Rising counts are updated in place; a
+    # falling one rebuilds the trie, whose per-prefix top lists can't make room
+    # for the tags below.
+    names = vault_tags.tag_names(old_tags) ^ vault_tags.tag_names(new_tags)
+    if not names:
+        return
+    counts = dict(db.tag_counts(names))
+    changes = {name: counts.get(name, 0) - tag_trie.uses.get(name, 0) for name in names}
+    if any(change < 0 for change in changes.values()):
+        rebuild_tag_trie()
+        return
+    for name, change in changes.items():
+        if change:
+            tag_trie.add(name, change)
+
+def complete_tags(event):
+    # Offers completions of the tag being typed (after the last , or |) in the dropdown
+    if event.keysym in ("Up", "Down", "Return", "Escape", "Tab"):
+        return
+    widget = event.widget
+    text = widget.get()
+    cut = max(text.rfind(","), text.rfind("|")) + 1
+    head, fragment = text[:cut], text[cut:]
+    spacer = " " if head and not head.endswith(" ") else ""
+    widget["values"] = [head + spacer + name for name in tag_trie.complete(fragment)] if fragment.strip() else []
+
+def add_facet(event=None):
+    # Picking a facet narrows the view to prompts that also have that tag
+    choice = facet_combo.get()
+    facet_combo.set("")
+    if not choice:
+        return
+    name = choice.rsplit(" (", 1)[0]
+    current = tag_filter_var.get().strip().rstrip(",")
+    tag_filter_var.set(f"{current}, {name}" if current else name)
+
+def update_status():
+    total, favs = totals.total, totals.favorites
+    visible = prompt_list.total
+    view = filter_var.get() if filter_var.get() != "All" else "All"
+    if search_var.get().strip():
+        view = f"{'Semantic' if isinstance(list_search(), SemanticSearch) else 'Search'}: '{search_var.get()}'"
+    if tag_filter_var.get().strip():
+        view += f" • Tags: '{tag_filter_var.get().strip()}'"
+    status_label.config(text=f"{visible} shown • {total} total • {favs} favorites • {view}")
+
+# --- History ---
+HISTORY_COMPACT_DELAY_MS = 30000
+
+def show_history():
+    prompt_id = prompt_list.selected_id()
+    if prompt_id is None:
+        messagebox.showwarning("History", "Select a prompt first.")
+        return
+    title = db.get_prompt(prompt_id)[0]
+    window = tk.Toplevel(root)
+    window.title(f"History of '{title}'")
+    window.geometry("720x520")
+    window.grid_columnconfigure(1, weight=1)
+    window.grid_rowconfigure(0, weight=1)
+    versions = tk.Listbox(window, width=28, exportselection=False)
+    versions.grid(row=0, column=0, sticky="ns", padx=(10, 5), pady=10)
+    preview = scrolledtext.ScrolledText(window, wrap="word")
+    preview.grid(row=0, column=1, sticky="nsew", padx=(5, 10), pady=10)
+    revs = []
+
+    def fill():
+        revs[:] = vault_history.revisions(db, prompt_id)
+        versions.delete(0, tk.END)
+        versions.insert(tk.END, *[f"#{rev['number']}  {rev['replaced_at']}" for rev in revs])
+        if not revs:
+            preview.delete("1.0", tk.END)
+            preview.insert(tk.END, "No earlier versions yet. Each save over this title keeps the text it replaces.")
+
+    def selected():
+        selection = versions.curselection()
+        return vault_history.revision(db, revs[selection[0]]["id"]) if selection else None
+
+    def show(event=None):
+        old = selected()
+        if old:
+            preview.delete("1.0", tk.END)
+            preview.insert(tk.END, f"Category: {old['category']}\nTags: {old['tags']}\n\n{old['positive']}"
+                                   f"\n\nNegative Prompt:\n{old['negative']}")
+
+    def load():
+        # Into the editor, to be saved (or not) like any edit
+        old = selected()
+        if old:
+            fill_fields((old["title"], old["category"], old["tags"], old["positive"], old["negative"]))
+
+    def restore():
+        selection = versions.curselection()
+        if selection and messagebox.askyesno("Restore", f"Make version #{revs[selection[0]]['number']} the current text?",
+                                             parent=window):
+            old_tags = db.get_prompt(prompt_id)[2]
+            with profiler.operation("restore_revision"):
+                vault_core.restore_revision(db, revs[selection[0]]["id"])
+            update_tag_trie(old_tags, db.get_prompt(prompt_id)[2])
+            fill()
+
+    versions.bind("<<ListboxSelect>>", show)
+    buttons = tk.Frame(window)
+    buttons.grid(row=1, column=0, columnspan=2, sticky="ew", padx=10, pady=(0, 10))
+    tk.Button(buttons, text="Load into Editor", command=load).pack(side="left")
+    tk.Button(buttons, text="Restore This Version", command=restore).pack(side="left", padx=6)
+    tk.Button(buttons, text="Close", command=window.destroy).pack(side="right")
+    fill()
+
+def compact_history():
+    # Retention: at most once a day, in the background
+    if not vault_history.compact_due(db):
+        return
+
+    def work(job_db, report):
+        return vault_history.compact(job_db)
+
+    def done(result, error):
+        update_status()
+        if error:
+            status_label.config(text=f"Trimming prompt history failed: {error}")
+
+    run_in_background(work, done, "compact_history")
+
+# --- Semantic search ---
+# Off until turned on; the first time builds the index in the background, and
+# searches stay keyword searches until it's done
+semantic_building = False
+
+def toggle_semantic():
+    global semantic_building
+    enabled = semantic_var.get()
+    if enabled and not vault_semantic.available():
+        semantic_var.set(False)
+        messagebox.showwarning("Semantic Search", vault_semantic.NEEDS_NUMPY)
+        return
+    set_setting("semantic_search", "1" if enabled else "0")
+    if not enabled or vault_semantic.built(db) or semantic_building:
+        load_prompts()
+        return
+    semantic_building = True
+
+    def work(job_db, report):
+        return vault_semantic.build(job_db, lambda n: report(f"Building the semantic index... {n} prompts"))
+
+    def done(result, error):
+        global semantic_building
+        semantic_building = False
+        if error:
+            semantic_var.set(False)
+            set_setting("semantic_search", "0")
+            messagebox.showerror("Error", f"Building the semantic index failed: {error}")
+        load_prompts()
+
+    run_in_background(work, done, "semantic_build")
+
+def more_like_selected():
+    # Like Find Similar, but by meaning rather than near-identical tags
+    prompt_id = prompt_list.selected_id()
+    if prompt_id is None:
+        messagebox.showwarning("More Like This", "Select a prompt first.")
+        return
+    if not vault_semantic.available():
+        messagebox.showwarning("More Like This", vault_semantic.NEEDS_NUMPY)
+        return
+    title = db.get_prompt(prompt_id)[0]
+
+    def work(job_db, report):
+        return vault_semantic.more_like(job_db, prompt_id, SEMANTIC_LIMIT,
+                                        progress=lambda n: report(f"Building the semantic index... {n} prompts"))
+
+    def done(result, error):
+        if error:
+            messagebox.showerror("Error", f"More like this failed: {error}")
+            return
+        ids = array("q", [prompt_id] + [other for other, _ in result])
+        prompt_list.show(ListPage(filter_var.get(), current_search(), db.rows_by_ids(LIST_COLUMNS, ids[:PAGE_SIZE]),
+                                  ids, len(ids)))
+        status_label.config(text=f"{len(result)} prompts like '{title}' • change the search or filter to go back")
+
+    run_in_background(work, done, "more_like")
+
+# --- Duplicates ---
+def indexing_progress(report):
+    return lambda n: report(f"Indexing prompts for similarity... {n} done")
+
+def find_similar():
+    # Shows the prompts that read almost like the selected one in the list;
+    # changing the search or filter goes back to the normal view
+    prompt_id = prompt_list.selected_id()
+    if prompt_id is None:
+        messagebox.showwarning("Find Similar", "Select a prompt first.")
+        return
+    title = db.get_prompt(prompt_id)[0]
+
+    def work(job_db, report):
+        return vault_dedupe.find_similar(job_db, prompt_id, progress=indexing_progress(report), sync_limit=None)
+
+    def done(result, error):
+        if error:
+            messagebox.showerror("Error", f"Find similar failed: {error}")
+            return
+        ids = array("q", [prompt_id] + [other for other, _ in result])
+        prompt_list.show(ListPage(filter_var.get(), current_search(), db.rows_by_ids(LIST_COLUMNS, ids[:PAGE_SIZE]),
+                                  ids, len(ids)))
+        status_label.config(text=f"{len(result)} prompts similar to '{title}' • change the search or filter to go back")
+
+    run_in_background(work, done, "find_similar")
+
+def duplicate_report():
+    def work(job_db, report):
+        groups = vault_dedupe.duplicate_report(job_db, progress=indexing_progress(report), sync_limit=None)
+        return vault_dedupe.describe_groups(job_db, groups)
+
+    def done(result, error):
+        update_status()
+        if error:
+            messagebox.showerror("Error", f"Duplicate report failed: {error}")
+            return
+        window = tk.Toplevel(root)
+        window.title("Near-Duplicate Prompts")
+        window.geometry("640x520")
+        text = scrolledtext.ScrolledText(window, font=("Arial", 10))
+        text.pack(fill="both", expand=True)
+        if not result:
+            text.insert(tk.END, "No near-duplicates found.")
+        for i, group in enumerate(result, 1):
+            text.insert(tk.END, f"Group {i} ({len(group)} prompts)\n")
+            for member in group:
+                text.insert(tk.END, f"    {member['similarity']:.0%}  [{member['category']}] {member['title']}\n")
+            text.insert(tk.END, "\n")
+        text.configure(state="disabled")
+
+    run_in_background(work, done, "duplicate_report")
+
+# A 256px copy of moon_key.png, decoded the first time About opens
+ABOUT_IMAGE = "moon_key_about.png"
+about_image = None
+
+def show_about():
+    global about_image
+    about = tk.Toplevel(root)
+    about.title("About AI Prompt Vault")
+    about.geometry("420x560")
+    about.configure(background="#1e1e1e")
+    about.resizable(False, False)
+
+    img_path = os.path.join(os.path.dirname(__file__), ABOUT_IMAGE) if __file__ else ABOUT_IMAGE
+    if about_image is None and os.path.exists(img_path):
+        try:
+            about_image = tk.PhotoImage(file=img_path)
+        except tk.TclError:
+            pass
+    if about_image is not None:
+        tk.Label(about, image=about_image, background="#1e1e1e").pack(pady=20)
+
+    tk.Label(about, text="AI Prompt Vault", font=("Arial", 20, "bold"), foreground="#bb86fc", background="#1e1e1e").pack(pady=10)
+    tk.Label(about, text="Version 7.6", font=("Arial", 12), foreground="#ffffff", background="#1e1e1e").pack()
+    info = "\nYour personal Stable Diffusion prompt manager\nwith Pony support, themes, backup, and inspiration tools.\n\nMade with passion for AI art ❤️"
+    tk.Label(about, text=info, foreground="#cccccc", background="#1e1e1e", justify="center").pack(pady=20)
+    tk.Button(about, text="Close", command=about.destroy, background="#7b1fa2", foreground="white").pack()
+
+# --- Diagnostics ---
+DIAGNOSTIC_COLUMNS = (("calls", "Calls"), ("p50_ms", "Median ms"), ("p95_ms", "p95 ms"), ("max_ms", "Max ms"),
+                      ("statements_per_call", "SQL/call"), ("rows_per_call", "Rows/call"))
+
+def set_profiling(enabled):
+    # Connections only time their statements if opened while profiling is on
+    profiler.enabled = enabled
+    set_setting("profiling", "1" if enabled else "0")
+    db.reopen()
+    searcher.reset()
+    facet_searcher.reset()
+
+def show_diagnostics():
+    window = tk.Toplevel(root)
+    window.title("Diagnostics")
+    window.geometry("760x560")
+    enabled_var = tk.BooleanVar(value=profiler.enabled)
+    top = tk.Frame(window)
+    top.pack(fill="x", padx=10, pady=6)
+    tk.Checkbutton(top, text="Record timings", variable=enabled_var,
+                   command=lambda: (set_profiling(enabled_var.get()), refresh())).pack(side="left")
+    summary = tk.Label(top, anchor="w")
+    summary.pack(side="left", padx=10)
+    tree = ttk.Treeview(window, columns=[key for key, _ in DIAGNOSTIC_COLUMNS], height=12)
+    tree.heading("#0", text="Operation")
+    tree.column("#0", width=160)
+    for key, label in DIAGNOSTIC_COLUMNS:
+        tree.heading(key, text=label)
+        tree.column(key, width=90, anchor="e")
+    tree.pack(fill="both", expand=True, padx=10)
+    tk.Label(window, text="Slowest statements", anchor="w").pack(fill="x", padx=10, pady=(6, 0))
+    slow_text = scrolledtext.ScrolledText(window, height=12, font=("Consolas", 9))
+    slow_text.pack(fill="both", expand=True, padx=10)
+
+    def refresh():
+        report = profiler.snapshot()
+        tree.delete(*tree.get_children())
+        for name, stats in report["operations"].items():
+            tree.insert("", tk.END, text=name, values=[stats[key] for key, _ in DIAGNOSTIC_COLUMNS])
+        state = "on" if report["enabled"] else "off"
+        summary.config(text=f"Recording {state} • since {report['since']} • statements over {report['slow_query_ms']} ms are logged")
+        slow_text.configure(state="normal")
+        slow_text.delete("1.0", tk.END)
+        for entry in report["slow_queries"]:
+            slow_text.insert(tk.END, f"{entry['ms']:.1f} ms  [{entry['operation']}]  {entry['sql']}\n")
+            for line in entry["plan"]:
+                slow_text.insert(tk.END, f"    {line}\n")
+        slow_text.configure(state="disabled")
+
+    def reset():
+        profiler.reset()
+        refresh()
+
+    def export():
+        file = filedialog.asksaveasfilename(initialfile="prompt_vault_diagnostics.json", defaultextension=".json",
+                                            filetypes=[("JSON", "*.json")])
+        if file:
+            profiler.export(file)
+
+    buttons = tk.Frame(window)
+    buttons.pack(fill="x", padx=10, pady=6)
+    tk.Button(buttons, text="Refresh", command=refresh).pack(side="left")
+    tk.Button(buttons, text="Reset", command=reset).pack(side="left", padx=6)
+    tk.Button(buttons, text="Export JSON...", command=export).pack(side="left")
+    tk.Button(buttons, text="Close", command=window.destroy).pack(side="right")
+    refresh()
+
+# --- Staged startup ---
+# Stage 1 runs before the window shows: it opens the vault, reads the settings
+# and builds the widgets, which take the saved theme's colors from the option
+# database. Stage 2 runs once the window has been painted: categories,
+# presets, tag autocomplete and the prompt list, which the search worker fills.
+#
+# With VAULT_STARTUP_TRACE=<file> set, "first_paint <time>" and
+# "interactive <time>" lines are appended to the file and the window closes
+# once the list is shown (see benchmarks/bench_startup.py).
+STARTUP_TRACE = os.environ.get("VAULT_STARTUP_TRACE")
+started = False
+
+def trace_startup(event):
+    if STARTUP_TRACE:
+        with open(STARTUP_TRACE, "a") as f:
+            f.write(f"{event} {time.time():.6f}\n")
+
+def on_first_map(event):
+    if event.widget is root:
+        root.unbind("<Map>")
+        root.after_idle(finish_startup)
+
+def finish_startup():
+    root.update_idletasks()
+    trace_startup("first_paint")
+    with profiler.operation("startup"):
+        rebuild_tag_trie()
+        refresh_dropdowns()
+        refresh_preset_menu()
+        load_prompts()
+    root.after(AUTO_BACKUP_CHECK_MS, check_auto_backup)
+    root.after(HISTORY_COMPACT_DELAY_MS, compact_history)
+
+def startup_done():
+    # The first page of prompts is on screen
+    global started
+    started = True
+    trace_startup("interactive")
+    if STARTUP_TRACE:
+        root.after_idle(on_closing)
+
+def on_closing():
+    geom = f"{root.winfo_width()}x{root.winfo_height()}+{root.winfo_x()}+{root.winfo_y()}"
+    set_setting("window_geometry", geom)
+    searcher.shutdown()
+    facet_searcher.shutdown()
+    db.close()
+    root.destroy()
+
+# --- GUI Setup ---
+root = tk.Tk()
+init_db()
+load_settings()
+if get_setting("profiling", "0") == "1":
+    profiler.enabled = True
+    db.reopen()
+root.geometry(get_setting("window_geometry", "900x1100+300+100"))
+try:
+    root.iconbitmap("vault.ico")
+except tk.TclError:
+    # .ico icons are Windows-only
+    pass
+root.title("AI Prompt Vault v7.6")
+style = ttk.Style()
+style.theme_use('clam')
+set_theme_defaults(THEMES[effective_theme(get_setting("selected_theme", "System"))])
+
+# Menu
+menubar = Menu(root)
+auto_backup_var = tk.StringVar(value="0")
+file_menu = Menu(menubar, tearoff=0)
+file_menu.add_command(label="Import Prompts...", command=import_file)
+file_menu.add_command(label="Import A1111 Styles...", command=lambda: import_file("a1111"))
+file_menu.add_command(label="Import ComfyUI Styles...", command=lambda: import_file("comfy"))
+file_menu.add_separator()
+file_menu.add_command(label="Export Current View...", command=export_file)
+file_menu.add_command(label="Export as A1111 Styles...", command=lambda: export_file("a1111"))
+file_menu.add_command(label="Export as ComfyUI Styles...", command=lambda: export_file("comfy"))
+file_menu.add_separator()
+auto_backup_menu = Menu(file_menu, tearoff=0)
+for hours, label in AUTO_BACKUP_CHOICES:
+    auto_backup_menu.add_radiobutton(label=label, value=hours, variable=auto_backup_var, command=set_auto_backup)
+file_menu.add_cascade(label="Automatic Backups", menu=auto_backup_menu)
+menubar.add_cascade(label="File", menu=file_menu)
+theme_menu = Menu(menubar, tearoff=0)
+theme_menu.add_command(label="Dark", command=lambda: set_theme("Dark"))
+theme_menu.add_command(label="Light", command=lambda: set_theme("Light"))
+theme_menu.add_command(label="System (Follow Windows)", command=lambda: set_theme("System"))
+menubar.add_cascade(label="Theme", menu=theme_menu)
+random_menu = Menu(menubar, tearoff=0)
+random_mode_var = tk.StringVar(value="uniform")
+for mode in vault_random.MODES:
+    random_menu.add_radiobutton(label=vault_random.MODE_LABELS[mode], value=mode, variable=random_mode_var,
+                                command=lambda: set_setting("random_mode", random_mode_var.get()))
+menubar.add_cascade(label="Random", menu=random_menu)
+preset_menu = Menu(menubar, tearoff=0)
+menubar.add_cascade(label="Presets", menu=preset_menu)
+tools_menu = Menu(menubar, tearoff=0)
+tools_menu.add_command(label="History of Selected...", command=show_history)
+tools_menu.add_command(label="Find Similar to Selected", command=find_similar)
+tools_menu.add_command(label="More Like Selected (Semantic)", command=more_like_selected)
+tools_menu.add_command(label="Near-Duplicate Report...", command=duplicate_report)
+menubar.add_cascade(label="Tools", menu=tools_menu)
+help_menu = Menu(menubar, tearoff=0)
+help_menu.add_command(label="Diagnostics", command=show_diagnostics)
+help_menu.add_command(label="About", command=show_about)
+menubar.add_cascade(label="Help", menu=help_menu)
+root.config(menu=menubar)
+
+# Main layout with grid for better resizing
+root.grid_rowconfigure(1, weight=1)
+root.grid_columnconfigure(0, weight=1)
+
+f1 = tk.LabelFrame(root, text=" Prompt Entry & Tools ", padx=10, pady=10)
+f1.grid(row=0, column=0, sticky="ew", padx=20, pady=10)
+f1.grid_columnconfigure(1, weight=1)
+f1.grid_rowconfigure(2, weight=1)
+f1.grid_rowconfigure(3, weight=1)
+
+tk.Label(f1, text="Title / LoRA Name:").grid(row=0, column=0, sticky="w", pady=5)
+title_entry = tk.Entry(f1, width=40)
+title_entry.grid(row=0, column=1, columnspan=2, sticky="ew", pady=5)
+
+pony_var = tk.BooleanVar(value=True)
+realism_var = tk.BooleanVar()
+preset_vars = {"Pony": pony_var, "Realism": realism_var}
+tk.Checkbutton(f1, text="Pony Mode (full scoring)", variable=pony_var).grid(row=0, column=3, padx=10)
+tk.Checkbutton(f1, text="Realism Mode", variable=realism_var).grid(row=0, column=4, padx=10)
+
+tk.Label(f1, text="Category:").grid(row=1, column=0, sticky="w", pady=5)
+cat_combo = ttk.Combobox(f1, width=38)
+cat_combo.grid(row=1, column=1, columnspan=2, sticky="ew", pady=5)
+
+tk.Label(f1, text="Positive Prompt:").grid(row=2, column=0, sticky="nw", pady=(10,2))
+pos_entry = scrolledtext.ScrolledText(f1, height=10)
+pos_entry.grid(row=2, column=1, columnspan=4, sticky="nsew", pady=5)
+
+tk.Label(f1, text="Negative Prompt:").grid(row=3, column=0, sticky="nw")
+neg_entry = scrolledtext.ScrolledText(f1, height=7)
+neg_entry.grid(row=3, column=1, columnspan=4, sticky="nsew", pady=5)
+
+tk.Label(f1, text="Tags:").grid(row=4, column=0, sticky="w", pady=5)
+tags_entry = ttk.Combobox(f1)
+tags_entry.grid(row=4, column=1, columnspan=4, sticky="ew", pady=5)
+tags_entry.bind("<KeyRelease>", complete_tags)
+
+btn_row = tk.Frame(f1)
+btn_row.grid(row=5, column=0, columnspan=5, pady=15)
+tk.Button(btn_row, text="➕ Add LoRA Syntax", command=add_lora_syntax, width=18).pack(side="left", padx=5)
+tk.Button(btn_row, text="💾 Save / Update", command=save_prompt, font=('Arial', 10, 'bold'), width=18).pack(side="left", padx=5)
+
+f2 = tk.LabelFrame(root, text=" Your Prompt Vault ", padx=10, pady=10)
+f2.grid(row=1, column=0, sticky="nsew", padx=20, pady=(0,10))
+f2.grid_rowconfigure(3, weight=1)
+f2.grid_columnconfigure(0, weight=1)
+
+search_var = tk.StringVar()
+search_var.trace_add("write", on_search_typed)
+tk.Label(f2, text="Search:").grid(row=0, column=0, sticky="w", padx=5, pady=5)
+search_row = tk.Frame(f2)
+search_row.grid(row=0, column=1, sticky="ew", padx=5, pady=5)
+tk.Entry(search_row, textvariable=search_var, width=60).pack(side="left", fill="x", expand=True)
+semantic_var = tk.BooleanVar(value=False)
+tk.Checkbutton(search_row, text="Semantic", variable=semantic_var, command=toggle_semantic).pack(side="left", padx=(10, 0))
+
+tk.Label(f2, text="Filter:").grid(row=1, column=0, sticky="w", padx=5, pady=(10,0))
+filter_var = tk.StringVar(value="All")
+filter_row = tk.Frame(f2)
+filter_row.grid(row=1, column=1, sticky="ew", padx=5, pady=2)
+f_menu = ttk.Combobox(filter_row, textvariable=filter_var, state="readonly", width=30)
+f_menu.pack(side="left")
+f_menu.bind("<<ComboboxSelected>>", load_prompts)
+# "a, b|c" = tagged a AND (b OR c); exact tags, unlike the search box
+tag_filter_var = tk.StringVar()
+tag_filter_var.trace_add("write", on_search_typed)
+tk.Label(filter_row, text="Tags:").pack(side="left", padx=(15, 5))
+tag_filter = ttk.Combobox(filter_row, textvariable=tag_filter_var, width=28)
+tag_filter.pack(side="left")
+tag_filter.bind("<KeyRelease>", complete_tags)
+tk.Label(filter_row, text="Top tags:").pack(side="left", padx=(15, 5))
+facet_combo = ttk.Combobox(filter_row, state="readonly", width=24)
+facet_combo.pack(side="left")
+facet_combo.bind("<<ComboboxSelected>>", add_facet)
+
+listbox = tk.Listbox(f2, font=("Arial", 11))
+listbox.grid(row=3, column=0, columnspan=2, sticky="nsew", pady=10, padx=(10,0))
+listbox.bind("<Double-Button-1>", load_selected)
+list_scroll = tk.Scrollbar(f2, orient="vertical")
+list_scroll.grid(row=3, column=2, sticky="ns", pady=10, padx=(0,10))
+prompt_list = PromptList(listbox, list_scroll, db)
+
+b_row = tk.Frame(f2)
+b_row.grid(row=4, column=0, columnspan=3, pady=10)
+tk.Button(b_row, text="📋 Positive", command=copy_positive, width=15).pack(side="left", padx=4)
+tk.Button(b_row, text="📋 Negative", command=copy_negative, width=15).pack(side="left", padx=4)
+tk.Button(b_row, text="📋 Both", command=copy_both, width=15).pack(side="left", padx=4)
+tk.Button(b_row, text="🗑 Delete", command=delete_prompt, width=15).pack(side="left", padx=4)
+tk.Button(b_row, text="⭐ Favorite", command=toggle_favorite, width=15).pack(side="left", padx=4)
+tk.Button(b_row, text="🎲 Random", command=random_prompt, width=15).pack(side="left", padx=8)
+tk.Button(b_row, text="💾 Backup", command=backup_database, width=15).pack(side="left", padx=8)
+tk.Button(b_row, text="📥 Restore", command=restore_database, width=15).pack(side="left", padx=8)
+
+status_frame = tk.Frame(root, relief="sunken", bd=1)
+status_frame.grid(row=2, column=0, sticky="ew")
+status_label = tk.Label(status_frame, anchor="w", padx=10)
+status_label.pack(side="left")
+
+# --- Startup ---
+random_mode_var.set(get_setting("random_mode", "uniform"))
+auto_backup_var.set(get_setting("auto_backup_hours", "0"))
+semantic_var.set(get_setting("semantic_search", "0") == "1" and vault_semantic.available() and vault_semantic.built(db))
+debounce_ms = int(get_setting("search_debounce_ms", "150"))
+totals = Totals(db)
+db.listeners.append(on_change)
+searcher = SearchScheduler(root, db, fetch_prompts, show_prompts, debounce_ms, show_search_error)
+facet_searcher = SearchScheduler(root, db, fetch_tag_facets, show_facets, debounce_ms, show_search_error)
+style_fixed_widgets(THEMES[effective_theme(get_setting("selected_theme", "System"))])
+root.bind("<Map>", on_first_map)
+
+root.protocol("WM_DELETE_WINDOW", on_closing)
+
+def run():
+    root.mainloop()
+
+if __name__ == "__main__":
+    run()
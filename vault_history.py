@@ -0,0 +1,172 @@
+import json
+import re
+import zlib
+from datetime import datetime, timedelta
+from difflib import SequenceMatcher
+
+# --- Revision history ---
+# Saving over an existing prompt keeps the text it replaces as a revision in
+# prompt_revisions. A revision is stored as a zlib-compressed delta against the
+# revision before it, so a prompt that's tweaked fifty times costs about fifty
+# small edits, not fifty copies. Every KEYFRAME_EVERY-th revision of a prompt
+# is stored whole instead, which caps how many deltas rebuilding one revision
+# applies. The newest version is always the prompt row itself.
+#
+# Deltas work on tag-sized tokens (the text between commas and newlines) per
+# field: a field is either unchanged (null) or a list of [start, end] copies of
+# the previous revision's tokens and literal strings.
+
+REVISION_FIELDS = ("category", "tags", "positive", "negative")
+KEYFRAME, DELTA = 0, 1
+KEYFRAME_EVERY = 32
+HISTORY_SETTINGS = (
+    # key, default
+    ("history_keep", "50"),  # revisions kept per prompt
+    ("history_days", "0"),  # drop revisions older than this; 0 = never
+    ("last_history_compact", ""),
+)
+COMPACT_EVERY = timedelta(days=1)
+TOKEN = re.compile(r"[^,\n]+|[,\n]")
+
+def init_history(cursor):
+    cursor.execute('''CREATE TABLE IF NOT EXISTS prompt_revisions
+                      (id INTEGER PRIMARY KEY,
+                       prompt_id INTEGER NOT NULL,
+                       replaced_at TEXT NOT NULL,
+                       kind INTEGER NOT NULL,
+                       data BLOB NOT NULL)''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_prompt_revisions_prompt ON prompt_revisions(prompt_id, id)")
+    # A deleted prompt takes its history with it
+    cursor.execute("""CREATE TRIGGER IF NOT EXISTS prompt_revisions_ad AFTER DELETE ON prompts BEGIN
+                      DELETE FROM prompt_revisions WHERE prompt_id = old.id; END""")
+
+# --- Encoding ---
+# Raw deflate: revisions are small, so zlib's 6-byte header and checksum add up
+def pack(value):
+    packer = zlib.compressobj(9, zlib.DEFLATED, -15)
+    return packer.compress(json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()) + packer.flush()
+
+def unpack(blob):
+    return json.loads(zlib.decompress(blob, -15))
+
+def diff(old, new):
+    delta = []
+    for before, after in zip(old, new):
+        if before == after:
+            delta.append(None)
+            continue
+        a, b = TOKEN.findall(before), TOKEN.findall(after)
+        ops = []
+        for tag, i1, i2, j1, j2 in SequenceMatcher(None, a, b, autojunk=False).get_opcodes():
+            if tag == "equal":
+                ops.append([i1, i2])
+            elif j2 > j1:
+                ops.append("".join(b[j1:j2]))
+        delta.append(ops)
+    return delta
+
+def patch(old, delta):
+    new = []
+    for before, ops in zip(old, delta):
+        if ops is None:
+            new.append(before)
+            continue
+        tokens = TOKEN.findall(before)
+        new.append("".join(op if isinstance(op, str) else "".join(tokens[op[0]:op[1]]) for op in ops))
+    return new
+
+# --- Recording ---
+def record_revision(conn, prompt_id, old, new, now):
+    # Called inside the save's transaction with the replaced and the new field
+    # values (REVISION_FIELDS order); an unchanged save records nothing
+    old, new = [text or "" for text in old], [text or "" for text in new]
+    if old == new:
+        return
+    chain = list(conn.execute("SELECT id FROM prompt_revisions WHERE prompt_id = ? AND kind = ? ORDER BY id DESC LIMIT 1",
+                              (prompt_id, KEYFRAME)))
+    since = 0
+    if chain:
+        since = conn.execute("SELECT COUNT(*) FROM prompt_revisions WHERE prompt_id = ? AND id > ?",
+                             (prompt_id, chain[0][0])).fetchone()[0]
+    if not chain or since + 1 >= KEYFRAME_EVERY:
+        kind, data = KEYFRAME, pack(old)
+    else:
+        latest = conn.execute("SELECT MAX(id) FROM prompt_revisions WHERE prompt_id = ?", (prompt_id,)).fetchone()[0]
+        kind, data = DELTA, pack(diff(rebuild(conn, latest), old))
+    conn.execute("INSERT INTO prompt_revisions (prompt_id, replaced_at, kind, data) VALUES (?, ?, ?, ?)",
+                 (prompt_id, now, kind, data))
+
+def rebuild(conn, revision_id):
+    # The field values of one revision: its keyframe plus the deltas up to it
+    row = conn.execute("SELECT prompt_id FROM prompt_revisions WHERE id = ?", (revision_id,)).fetchone()
+    if row is None:
+        return None
+    deltas = []
+    for kind, data in conn.execute("""SELECT kind, data FROM prompt_revisions WHERE prompt_id = ? AND id <= ?
+                                      ORDER BY id DESC""", (row[0], revision_id)):
+        if kind == KEYFRAME:
+            fields = unpack(data)
+            break
+        deltas.append(unpack(data))
+    else:
+        raise ValueError(f"Revision {revision_id} has no keyframe")
+    for delta in reversed(deltas):
+        fields = patch(fields, delta)
+    return fields
+
+# --- Browsing ---
+def revisions(db, prompt_id):
+    # Newest first; number 1 is the oldest revision kept
+    rows = db.conn.execute("""SELECT id, replaced_at, length(data) FROM prompt_revisions WHERE prompt_id = ?
+                              ORDER BY id DESC""", (prompt_id,)).fetchall()
+    return [{"id": rev_id, "number": len(rows) - i, "replaced_at": replaced_at, "bytes": size}
+            for i, (rev_id, replaced_at, size) in enumerate(rows)]
+
+def revision(db, revision_id):
+    # {"prompt_id", "title", "replaced_at", category/tags/positive/negative} or None
+    row = db.conn.execute("""SELECT r.prompt_id, p.title, r.replaced_at FROM prompt_revisions r
+                             JOIN prompts p ON p.id = r.prompt_id WHERE r.id = ?""", (revision_id,)).fetchone()
+    if row is None:
+        return None
+    return dict(zip(("prompt_id", "title", "replaced_at") + REVISION_FIELDS, row + tuple(rebuild(db.conn, revision_id))))
+
+# --- Retention ---
+def history_settings(db):
+    return {key: db.get_setting(key, default) for key, default in HISTORY_SETTINGS}
+
+def compact(db, keep=None, days=None, now=None):
+    # Drops revisions beyond the newest `keep` per prompt and those replaced
+    # more than `days` ago (defaults: the history_* settings), rewriting the
+    # oldest survivor of each trimmed prompt as a keyframe. Returns revisions removed.
+    settings = history_settings(db)
+    keep = int(settings["history_keep"] if keep is None else keep)
+    days = float(settings["history_days"] if days is None else days)
+    now = now or datetime.now()
+    cutoff = (now - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S") if days > 0 else ""
+    conn = db.conn
+    trimmed = [row[0] for row in conn.execute("""SELECT prompt_id FROM prompt_revisions GROUP BY prompt_id
+                                                 HAVING COUNT(*) > ? OR MIN(replaced_at) < ?""", (keep, cutoff))]
+    removed = 0
+    for prompt_id in trimmed:
+        ids = [row[0] for row in conn.execute("SELECT id FROM prompt_revisions WHERE prompt_id = ? ORDER BY id DESC",
+                                              (prompt_id,))]
+        dropped = set(ids[keep:])
+        if cutoff:
+            dropped.update(rev_id for (rev_id,) in conn.execute(
+                "SELECT id FROM prompt_revisions WHERE prompt_id = ? AND replaced_at < ?", (prompt_id, cutoff)))
+        kept = [rev_id for rev_id in ids if rev_id not in dropped]
+        with conn:
+            first = kept[-1] if kept else None
+            if first and conn.execute("SELECT kind FROM prompt_revisions WHERE id = ?", (first,)).fetchone()[0] != KEYFRAME:
+                conn.execute("UPDATE prompt_revisions SET kind = ?, data = ? WHERE id = ?",
+                             (KEYFRAME, pack(rebuild(conn, first)), first))
+            conn.executemany("DELETE FROM prompt_revisions WHERE id = ?", [(rev_id,) for rev_id in dropped])
+        removed += len(dropped)
+    db.set_setting("last_history_compact", now.strftime("%Y-%m-%d %H:%M:%S"))
+    return removed
+
+def compact_due(db, now=None):
+    last = db.get_setting("last_history_compact", "")
+    if not last:
+        return True
+    return (now or datetime.now()) - datetime.strptime(last, "%Y-%m-%d %H:%M:%S") >= COMPACT_EVERY
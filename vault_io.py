@@ -0,0 +1,270 @@
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+import vault_core
+from vault_db import DB_PATH, VaultDB, build_prompt_query
+
+FIELDS = ("title", "category", "tags", "positive", "negative", "favorite", "last_used")
+FORMATS = ("jsonl", "json", "csv", "txt", "a1111", "comfy")
+CONFLICT_POLICIES = ("skip", "replace", "newer", "rename")
+BATCH_SIZE = 1000
+
+# What happens when an imported title already exists. Every policy keeps the
+# existing row's id; only "replace" and "newer" touch its contents. They take
+# every field from the file except favorite, which an import can set but never
+# clear: most formats (txt, a1111, comfy) carry no favorites at all, and
+# replacing from one of them shouldn't unstar the whole vault.
+UPSERTS = {
+    "skip": "ON CONFLICT(title) DO NOTHING",
+    "replace": """ON CONFLICT(title) DO UPDATE SET category = excluded.category, tags = excluded.tags,
+                  positive = excluded.positive, negative = excluded.negative,
+                  favorite = MAX(favorite, excluded.favorite), last_used = excluded.last_used""",
+    "newer": """ON CONFLICT(title) DO UPDATE SET category = excluded.category, tags = excluded.tags,
+                positive = excluded.positive, negative = excluded.negative,
+                favorite = MAX(favorite, excluded.favorite), last_used = excluded.last_used
+                WHERE excluded.last_used > prompts.last_used""",
+}
+
+def guess_format(path):
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    if ext == "ndjson":
+        return "jsonl"
+    if ext not in ("jsonl", "json", "csv", "txt"):
+        raise ValueError(f"Can't tell the format of '{path}'; pass one of: {', '.join(FORMATS)}")
+    return ext
+
+# --- Readers ---
+# Each reader yields prompt dicts one at a time so memory stays flat regardless of file size.
+def read_jsonl(f):
+    for line in f:
+        line = line.strip()
+        if line:
+            yield json.loads(line)
+
+def read_json_array(f, chunk_size=65536):
+    # Incrementally decodes a top-level JSON array without loading the whole file
+    decoder = json.JSONDecoder()
+    buf = ""
+    started = False
+    eof = False
+    while True:
+        buf = buf.lstrip()
+        if not started:
+            if not buf and not eof:
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buf += chunk
+                continue
+            if not buf.startswith("["):
+                raise ValueError("Expected a JSON array of prompts")
+            buf = buf[1:]
+            started = True
+            continue
+        if buf.startswith(","):
+            buf = buf[1:]
+            continue
+        if buf.startswith("]"):
+            return
+        try:
+            item, end = decoder.raw_decode(buf)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf += chunk
+            continue
+        yield item
+        buf = buf[end:]
+
+def read_csv(f):
+    yield from csv.DictReader(f)
+
+def read_styles(rows):
+    # A1111 styles.csv and ComfyUI style JSON both use name / prompt / negative_prompt
+    for row in rows:
+        yield {"title": row.get("name"), "category": "Style", "positive": row.get("prompt"),
+               "negative": row.get("negative_prompt")}
+
+def read_prompts(f, fmt):
+    if fmt == "jsonl":
+        return read_jsonl(f)
+    if fmt == "json":
+        return read_json_array(f)
+    if fmt == "csv":
+        return read_csv(f)
+    if fmt == "a1111":
+        return read_styles(read_csv(f))
+    if fmt == "comfy":
+        return read_styles(read_json_array(f))
+    raise ValueError(f"Can't import from {fmt}")
+
+def normalize(item, now):
+    title = str(item.get("title") or "").strip()
+    if not title:
+        return None
+    try:
+        favorite = 1 if int(item.get("favorite") or 0) else 0
+    except (TypeError, ValueError):
+        favorite = 1 if str(item.get("favorite")).strip().lower() in ("true", "yes", "★") else 0
+    return (title,
+            str(item.get("category") or "").strip(),
+            str(item.get("tags") or "").strip().lower(),
+            str(item.get("positive") or "").strip(),
+            str(item.get("negative") or "").strip(),
+            favorite,
+            str(item.get("last_used") or now))
+
+def batched(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+# --- Import ---
+def import_prompts(db, f, fmt, on_conflict="skip", progress=None, batch_size=BATCH_SIZE):
+    # Returns (rows read, rows written). progress(rows_read) is called after each batch.
+    if on_conflict not in CONFLICT_POLICIES:
+        raise ValueError(f"Unknown conflict policy '{on_conflict}'")
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    insert = f"INSERT INTO prompts ({', '.join(FIELDS)}) VALUES ({', '.join('?' * len(FIELDS))})"
+    read = written = 0
+    rows = (normalize(item, now) for item in read_prompts(f, fmt))
+    for batch in batched((row for row in rows if row), batch_size):
+        read += len(batch)
+        with db.conn:
+            if on_conflict == "rename":
+                for row in batch:
+                    written += db.conn.execute(insert, (unique_title(db, row[0]),) + row[1:]).rowcount
+            else:
+                written += db.conn.executemany(f"{insert} {UPSERTS[on_conflict]}", batch).rowcount
+        if progress:
+            progress(read)
+    return read, written
+
+def unique_title(db, title):
+    candidate, n = title, 1
+    while db.conn.execute("SELECT 1 FROM prompts WHERE title=?", (candidate,)).fetchone():
+        n += 1
+        candidate = f"{title} ({n})"
+    return candidate
+
+# --- Export ---
+def iter_prompts(db, cat="All", search=""):
+    # Streams rows straight off the cursor instead of fetchall()
+    columns = ", ".join(f"p.{c}" for c in FIELDS)
+    query, params = build_prompt_query(columns, cat, search, fts=db.fts_enabled)
+    try:
+        cursor = db.conn.execute(query, params)
+    except sqlite3.OperationalError:
+        query, params = build_prompt_query(columns, cat, search, fts=False)
+        cursor = db.conn.execute(query, params)
+    for row in cursor:
+        yield dict(zip(FIELDS, row))
+
+def write_prompts(f, rows, fmt):
+    if fmt == "jsonl":
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            yield
+    elif fmt in ("json", "comfy"):
+        f.write("[")
+        for i, row in enumerate(rows):
+            if fmt == "comfy":
+                row = {"name": row["title"], "prompt": row["positive"], "negative_prompt": row["negative"]}
+            f.write(("," if i else "") + "\n  " + json.dumps(row, ensure_ascii=False))
+            yield
+        f.write("\n]\n")
+    elif fmt in ("csv", "a1111"):
+        if fmt == "csv":
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+        else:
+            writer = csv.DictWriter(f, fieldnames=("name", "prompt", "negative_prompt"))
+        writer.writeheader()
+        for row in rows:
+            if fmt == "a1111":
+                row = {"name": row["title"], "prompt": row["positive"], "negative_prompt": row["negative"]}
+            writer.writerow(row)
+            yield
+    elif fmt == "txt":
+        for row in rows:
+            star = "★ " if row["favorite"] else ""
+            f.write(f"=== [{row['category']}] {star}{row['title']} ===\n")
+            if row["tags"]:
+                f.write(f"Tags: {row['tags']}\n")
+            f.write(f"{row['positive']}\n\nNegative Prompt:\n{row['negative']}\n\n")
+            yield
+    else:
+        raise ValueError(f"Can't export to {fmt}")
+
+def export_prompts(db, f, fmt, cat="All", search="", progress=None, every=BATCH_SIZE, presets=()):
+    # presets: names of formatting presets to bake into the exported text
+    count = 0
+    rows = iter_prompts(db, cat, search)
+    if presets:
+        rows = vault_core.presets.format_many(db, rows, presets)
+    for _ in write_prompts(f, rows, fmt):
+        count += 1
+        if progress and count % every == 0:
+            progress(count)
+    return count
+
+def open_for(path, mode):
+    # utf-8-sig reads files saved by Excel; newline="" is what the csv module wants
+    return open(path, mode, encoding="utf-8-sig" if mode == "r" else "utf-8", newline="")
+
+# --- Command line ---
+def add_commands(sub):
+    imp = sub.add_parser("import", help="merge prompts from a file")
+    imp.add_argument("file")
+    imp.add_argument("--format", choices=FORMATS)
+    imp.add_argument("--on-conflict", choices=CONFLICT_POLICIES, default="skip",
+                     help="what to do when a title already exists (default: %(default)s); "
+                          "replace and newer overwrite everything but favorites, which they only add")
+    imp.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    exp = sub.add_parser("export", help="write prompts to a file")
+    exp.add_argument("file")
+    exp.add_argument("--format", choices=FORMATS)
+    exp.add_argument("--category", default="All", help="category, Favorites or All (default: %(default)s)")
+    exp.add_argument("--search", default="", help="only export prompts matching this search")
+    exp.add_argument("--preset", action="append", default=[], help="format the text with a preset (repeatable)")
+
+def run_command(db, args):
+    fmt = args.format or guess_format(args.file)
+    if args.command == "import":
+        with open_for(args.file, "r") as f:
+            report = lambda n: print(f"\r{n} read", end="", file=sys.stderr, flush=True)
+            read, written = import_prompts(db, f, fmt, args.on_conflict, report, args.batch_size)
+        print(f"\rImported {written} of {read} prompts from {args.file}", file=sys.stderr)
+    else:
+        try:
+            vault_core.presets.pipeline(db, args.preset)  # fail before creating the file
+        except ValueError as e:
+            raise SystemExit(str(e))
+        with open_for(args.file, "w") as f:
+            count = export_prompts(db, f, fmt, args.category, args.search, presets=args.preset)
+        print(f"Exported {count} prompts to {args.file}", file=sys.stderr)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="vault_io", description="Bulk import/export for AI Prompt Vault")
+    parser.add_argument("--db", default=DB_PATH, help="vault database (default: %(default)s)")
+    add_commands(parser.add_subparsers(dest="command", required=True))
+    args = parser.parse_args(argv)
+    db = VaultDB(args.db)
+    db.init_db()
+    try:
+        run_command(db, args)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import tkinter as tk
+from array import array
+from collections import namedtuple
+
+import vault_semantic
+
+LIST_COLUMNS = "p.id, p.title, p.category, p.favorite, p.last_used"
+PAGE_SIZE = 200
+# Fetch the next page once the bottom of the viewport passes this fraction of the loaded rows
+LOAD_MORE_AT = 0.8
+# Tag facets (most used tags in the current view) shown beside the filter
+FACET_LIMIT = 20
+# Semantic search shows this many of the closest prompts
+SEMANTIC_LIMIT = 500
+
+# A semantic search as handed to fetch_first_page: `text` is ranked by meaning
+# among the prompts matching the keyword/tag `filter`
+SemanticSearch = namedtuple("SemanticSearch", "text filter")
+
+def format_row(row):
+    star = "★ " if row[3] else ""
+    return f"[{row[2]}] {star}{row[1]}"
+
+# --- Paging ---
+# Browsing (no search text) is keyset-paginated on (last_used, id), so every page
+# is an index range scan no matter how deep the user scrolls. Search results are
+# ranked by bm25, so the worker keeps the ranked id list and pages are fetched
+# by primary key. Semantic results are a ranked id list too; their page's
+# `search` is the filter, which is what change events are matched against.
+class ListPage:
+    def __init__(self, cat, search, rows, ids, total):
+        self.cat = cat
+        self.search = search
+        self.rows = rows
+        self.ids = ids
+        self.total = total
+
+def fetch_first_page(db, cat, search):
+    if isinstance(search, SemanticSearch):
+        found = vault_semantic.search(db, [search.text], SEMANTIC_LIMIT, cat, search.filter)[0]
+        ids = array("q", (prompt_id for prompt_id, _ in found))
+        return ListPage(cat, search.filter, db.rows_by_ids(LIST_COLUMNS, ids[:PAGE_SIZE]), ids, len(ids))
+    if search:
+        ids = array("q", (row[0] for row in db.query_prompts("p.id", cat, search)))
+        return ListPage(cat, search, db.rows_by_ids(LIST_COLUMNS, ids[:PAGE_SIZE]), ids, len(ids))
+    rows = db.query_prompts(LIST_COLUMNS, cat, "", limit=PAGE_SIZE)
+    return ListPage(cat, search, rows, None, db.count_prompts(cat))
+
+def in_category(cat, fields):
+    # Whether a row with these change-event fields belongs to the All/Favorites/category filter
+    return cat == "All" or (cat == "Favorites" and bool(fields["favorite"])) or fields["category"] == cat
+
+def fetch_facets(db, cat, search):
+    # Runs on its own SearchScheduler so a broad search shows its rows without
+    # waiting for the tag counts
+    return db.tag_facets(cat, search, FACET_LIMIT)
+
+# --- Totals ---
+# Prompt counts for the status bar and the category dropdowns, read once and
+# then kept current from VaultDB change events.
+class Totals:
+    def __init__(self, db):
+        self.reload(db)
+
+    def reload(self, db):
+        self.by_category = db.category_counts()
+        self.favorites = db.counts()[1]
+
+    @property
+    def total(self):
+        return sum(self.by_category.values())
+
+    def categories(self):
+        return {cat for cat, total in self.by_category.items() if cat and total > 0}
+
+    def apply(self, op, fields):
+        if op != "insert":
+            self._add(fields.get("previous", fields), -1)
+        if op != "delete":
+            self._add(fields, 1)
+
+    def _add(self, fields, n):
+        cat = fields["category"] or ""
+        self.by_category[cat] = self.by_category.get(cat, 0) + n
+        self.favorites += n if fields["favorite"] else 0
+
+# --- List view ---
+# Keeps only the rows fetched so far in the Listbox and pulls in the next page as
+# the user scrolls towards the end. `ids` is parallel to the Listbox lines, so
+# actions look prompts up by id instead of parsing the display text.
+class PromptList:
+    def __init__(self, listbox, scrollbar, db):
+        self.listbox = listbox
+        self.scrollbar = scrollbar
+        self.db = db
+        self.page = None
+        self.ids = array("q")
+        self.keys = []
+        self.total = 0
+        self._last_key = None
+        self._more_pending = False
+        listbox.configure(yscrollcommand=self._on_yscroll)
+        scrollbar.configure(command=listbox.yview)
+
+    def show(self, page):
+        self.page = page
+        self.ids = array("q")
+        self.keys = []
+        self._last_key = None
+        self.total = page.total
+        self.listbox.delete(0, tk.END)
+        self._append(page.rows)
+
+    def has_more(self):
+        return self.page is not None and len(self.ids) < self.total
+
+    def selected_index(self):
+        selection = self.listbox.curselection()
+        return selection[0] if selection else None
+
+    def selected_id(self):
+        index = self.selected_index()
+        return self.ids[index] if index is not None else None
+
+    def remove(self, index):
+        self.listbox.delete(index)
+        del self.ids[index]
+        del self.keys[index]
+        self.total -= 1
+        if self.page.ids is not None:
+            del self.page.ids[index]
+
+    # --- Change events ---
+    # A saved, deleted or updated prompt is moved, inserted or dropped in place;
+    # nothing is requeried. Browsing keeps the (last_used, id) order exactly, and
+    # a row that lands below the loaded rows is only counted, to be fetched when
+    # scrolled to. Search results are ranked, so a new match goes to the top.
+    def apply_change(self, op, prompt_id, fields, matches):
+        # matches() asks the database whether the prompt is in the current search
+        page = self.page
+        if page is None:
+            return
+        browsing = page.ids is None
+        if op == "insert":
+            listed = False
+        elif browsing:
+            listed = in_category(page.cat, fields.get("previous", fields))
+        else:
+            listed = prompt_id in page.ids
+        if op == "delete":
+            visible = False
+        elif browsing:
+            visible = in_category(page.cat, fields)
+        elif (op == "update" and not fields.get("edited")
+              and in_category(page.cat, fields) == in_category(page.cat, fields["previous"])):
+            # Favorite and last_used changes can't move a prompt in or out of a search
+            visible = listed
+        else:
+            visible = matches()
+        index = self.index_of(prompt_id) if listed else None
+        selected = index is not None and index in self.listbox.curselection()
+        if listed:
+            self._drop(prompt_id, index)
+        if visible:
+            index = self._place(prompt_id, fields)
+            if selected and index is not None:
+                self.listbox.selection_set(index)
+
+    def index_of(self, prompt_id):
+        try:
+            return self.ids.index(prompt_id)
+        except ValueError:
+            return None
+
+    def _drop(self, prompt_id, index):
+        if index is not None:
+            self.remove(index)
+            return
+        self.total -= 1
+        if self.page.ids is not None and prompt_id in self.page.ids:
+            del self.page.ids[self.page.ids.index(prompt_id)]
+
+    def _place(self, prompt_id, fields):
+        # Returns the new line's index, or None if it's below the loaded rows
+        key = (fields["last_used"], prompt_id)
+        if self.page.ids is None:
+            index, high = 0, len(self.keys)
+            while index < high:
+                mid = (index + high) // 2
+                if self.keys[mid] > key:
+                    index = mid + 1
+                else:
+                    high = mid
+            if index == len(self.keys) and self.has_more():
+                self.total += 1
+                return None
+        else:
+            index = 0
+            self.page.ids.insert(0, prompt_id)
+        self.total += 1
+        self.ids.insert(index, prompt_id)
+        self.keys.insert(index, key)
+        self._last_key = self.keys[-1]
+        self.listbox.insert(index, format_row((prompt_id, fields["title"], fields["category"], fields["favorite"])))
+        return index
+
+    def load_more(self):
+        self._more_pending = False
+        if not self.has_more():
+            return
+        page = self.page
+        start = len(self.ids)
+        if page.ids is not None:
+            ids = page.ids[start:start + PAGE_SIZE]
+            rows = self.db.rows_by_ids(LIST_COLUMNS, ids)
+            if len(rows) < len(ids):
+                # Rows deleted since the search ran
+                self.total -= len(ids) - len(rows)
+                page.ids[start:start + len(ids)] = array("q", (row[0] for row in rows))
+        else:
+            rows = self.db.query_prompts(LIST_COLUMNS, page.cat, "", after=self._last_key, limit=PAGE_SIZE)
+            if len(rows) < PAGE_SIZE:
+                self.total = start + len(rows)
+        self._append(rows)
+
+    def _append(self, rows):
+        if rows:
+            self.ids.extend(row[0] for row in rows)
+            self.keys += [(row[4], row[0]) for row in rows]
+            self._last_key = self.keys[-1]
+            self.listbox.insert(tk.END, *[format_row(row) for row in rows])
+
+    def _on_yscroll(self, first, last):
+        self.scrollbar.set(first, last)
+        if float(last) >= LOAD_MORE_AT and self.has_more() and not self._more_pending:
+            # Defer so we don't insert rows from inside Tk's scroll callback
+            self._more_pending = True
+            self.listbox.after_idle(self.load_more)
@@ -0,0 +1,204 @@
+import threading
+from collections import OrderedDict
+
+# --- Presets ---
+# A preset is a set of tags to put in front of / behind the positive and negative
+# prompts (Pony score tags, Realism source tags, ...). Presets live in the
+# `presets` table; built-ins are seeded by init_db() and can be edited like
+# user presets. Every edit bumps the preset's version.
+
+BUILTIN_PRESETS = (
+    # name, positive prefix, positive suffix, negative prefix, negative suffix
+    ("Pony",
+     "score_9, score_8_up, score_7_up, score_6_up, score_5_up, score_4_up", "",
+     "score_6, score_5, score_4, low quality, worst quality, bad anatomy, bad hands, missing fingers", ""),
+    ("Realism",
+     "", "source_real, realistic, photo, photorealistic",
+     "", "source_pony, source_anime, source_cartoon, drawing, illustration"),
+    ("SDXL",
+     "", "masterpiece, best quality, highly detailed",
+     "", "lowres, worst quality, low quality, jpeg artifacts, watermark, signature"),
+)
+PRESET_FIELDS = ("name", "positive_prefix", "positive_suffix", "negative_prefix", "negative_suffix")
+CACHE_SIZE = 4096
+
+def init_presets(cursor):
+    cursor.execute('''CREATE TABLE IF NOT EXISTS presets
+                      (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                       name TEXT UNIQUE NOT NULL,
+                       positive_prefix TEXT NOT NULL DEFAULT '',
+                       positive_suffix TEXT NOT NULL DEFAULT '',
+                       negative_prefix TEXT NOT NULL DEFAULT '',
+                       negative_suffix TEXT NOT NULL DEFAULT '',
+                       version INTEGER NOT NULL DEFAULT 1,
+                       builtin INTEGER NOT NULL DEFAULT 0)''')
+    cursor.executemany(f"INSERT OR IGNORE INTO presets ({', '.join(PRESET_FIELDS)}, builtin) VALUES (?, ?, ?, ?, ?, 1)",
+                       BUILTIN_PRESETS)
+
+# --- Tags ---
+OPENERS = {"(": ")", "[": "]", "{": "}", "<": ">"}
+
+def split_tags(text):
+    # Splits on commas that aren't inside (), [], {} or <...> so weights like
+    # (red hair:1.2) and <lora:name:0.8> stay in one piece
+    if not any(ch in text for ch in OPENERS):
+        return [tag.strip() for tag in text.split(",") if tag.strip()]
+    tags, depth, start = [], [], 0
+    for i, ch in enumerate(text):
+        if ch in OPENERS:
+            depth.append(OPENERS[ch])
+        elif depth and ch == depth[-1]:
+            depth.pop()
+        elif ch == "," and not depth:
+            tags.append(text[start:i])
+            start = i + 1
+    tags.append(text[start:])
+    return [tag.strip() for tag in tags if tag.strip()]
+
+def tag_key(tag):
+    # What makes two tags "the same": case, emphasis brackets and weights are
+    # ignored, and a LoRA is identified by its name, not its strength
+    tag = tag.strip()
+    if ":" not in tag and tag[:1] not in OPENERS:
+        return " ".join(tag.lower().split())
+    if tag.startswith("<") and tag.endswith(">"):
+        return ":".join(tag[1:-1].split(":")[:2]).strip().lower()
+    while len(tag) > 1 and tag[0] in "([{" and tag[-1] == OPENERS[tag[0]]:
+        tag = tag[1:-1].strip()
+    name, sep, weight = tag.rpartition(":")
+    if sep and name:
+        try:
+            float(weight)
+            tag = name
+        except ValueError:
+            pass
+    return " ".join(tag.lower().split())
+
+class TagTransform:
+    # Prefix tags first, then the prompt's own tags (first occurrence of each
+    # wins), then suffix tags. A prefix/suffix tag the prompt already has keeps
+    # the prompt's spelling and weight but moves to the preset's position, which
+    # makes the transform idempotent.
+    def __init__(self, prefix, suffix):
+        self.fixed = set()
+        self.prefix = self._unique(prefix)
+        self.suffix = self._unique(suffix)
+
+    def _unique(self, text):
+        tags = []
+        for tag in split_tags(text):
+            key = tag_key(tag)
+            if key not in self.fixed:
+                self.fixed.add(key)
+                tags.append((key, tag))
+        return tags
+
+    def __call__(self, text):
+        if not self.fixed:
+            return text
+        seen, found, body = set(), {}, []
+        for tag in split_tags(text):
+            key = tag_key(tag)
+            if key in seen:
+                continue
+            seen.add(key)
+            if key in self.fixed:
+                found[key] = tag
+            else:
+                body.append(tag)
+        head = [found.get(key, tag) for key, tag in self.prefix]
+        tail = [found.get(key, tag) for key, tag in self.suffix]
+        return ", ".join(head + body + tail)
+
+class CompiledPreset:
+    def __init__(self, name, version, positive_prefix, positive_suffix, negative_prefix, negative_suffix):
+        self.name = name
+        self.version = version
+        self.positive = TagTransform(positive_prefix, positive_suffix)
+        self.negative = TagTransform(negative_prefix, negative_suffix)
+
+# --- Engine ---
+# Compiles presets once per version and memoizes formatted prompts per
+# (prompt id, preset versions). A cached entry also remembers the text it was
+# made from, so editing the prompt invalidates it without any bookkeeping.
+class PresetEngine:
+    def __init__(self, cache_size=CACHE_SIZE):
+        self.cache_size = cache_size
+        self.compiled = {}
+        self.results = OrderedDict()
+        self.lock = threading.Lock()
+
+    def clear(self):
+        with self.lock:
+            self.compiled.clear()
+            self.results.clear()
+
+    def pipeline(self, db, names):
+        if not names:
+            return ()
+        versions = dict(db.conn.execute("SELECT name, version FROM presets"))
+        pipeline = []
+        for name in names:
+            if name not in versions:
+                raise ValueError(f"Unknown preset '{name}'")
+            compiled = self.compiled.get(name)
+            if compiled is None or compiled.version != versions[name]:
+                row = db.conn.execute(f"SELECT {', '.join(PRESET_FIELDS)}, version FROM presets WHERE name=?",
+                                      (name,)).fetchone()
+                compiled = CompiledPreset(row[0], row[5], *row[1:5])
+                self.compiled[name] = compiled
+            pipeline.append(compiled)
+        return tuple(pipeline)
+
+    def apply(self, pipeline, pos, neg):
+        for preset in pipeline:
+            pos, neg = preset.positive(pos), preset.negative(neg)
+        return pos, neg
+
+    def format(self, db, pos, neg, names, prompt_id=None):
+        pipeline = self.pipeline(db, names)
+        if prompt_id is None or not pipeline:
+            return self.apply(pipeline, pos, neg)
+        return self._memoized(pipeline, prompt_id, pos, neg)
+
+    def format_many(self, db, records, names):
+        # Batch API: compiles the pipeline once, then yields each record
+        # (a dict with id/positive/negative) with formatted text
+        pipeline = self.pipeline(db, names)
+        for record in records:
+            if pipeline:
+                pos, neg = self._memoized(pipeline, record.get("id"), record["positive"], record["negative"])
+                record = dict(record, positive=pos, negative=neg)
+            yield record
+
+    def _memoized(self, pipeline, prompt_id, pos, neg):
+        key = (prompt_id, tuple((preset.name, preset.version) for preset in pipeline))
+        with self.lock:
+            hit = self.results.get(key)
+            if hit is not None and hit[0] == pos and hit[1] == neg:
+                self.results.move_to_end(key)
+                return hit[2], hit[3]
+        out_pos, out_neg = self.apply(pipeline, pos, neg)
+        if prompt_id is not None:
+            with self.lock:
+                self.results[key] = (pos, neg, out_pos, out_neg)
+                if len(self.results) > self.cache_size:
+                    self.results.popitem(last=False)
+        return out_pos, out_neg
+
+# --- Preset storage ---
+def list_presets(db):
+    return [dict(zip(PRESET_FIELDS + ("version", "builtin"), row)) for row in
+            db.conn.execute(f"SELECT {', '.join(PRESET_FIELDS)}, version, builtin FROM presets ORDER BY builtin DESC, name")]
+
+def save_preset(db, name, positive_prefix="", positive_suffix="", negative_prefix="", negative_suffix=""):
+    with db.conn:
+        db.conn.execute(f"""INSERT INTO presets ({', '.join(PRESET_FIELDS)}) VALUES (?, ?, ?, ?, ?)
+                            ON CONFLICT(name) DO UPDATE SET positive_prefix = excluded.positive_prefix,
+                            positive_suffix = excluded.positive_suffix, negative_prefix = excluded.negative_prefix,
+                            negative_suffix = excluded.negative_suffix, version = version + 1""",
+                        (name, positive_prefix, positive_suffix, negative_prefix, negative_suffix))
+
+def delete_preset(db, name):
+    with db.conn:
+        db.conn.execute("DELETE FROM presets WHERE name=? AND builtin=0", (name,))
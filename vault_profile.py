@@ -0,0 +1,245 @@
+import json
+import sqlite3
+import threading
+import time
+from functools import wraps
+
+# --- Profiling ---
+# Opt-in timing for the app's operations (save, search, backup, ...): a latency
+# histogram per operation, the SQL statements and rows each one ran, and a log
+# of slow statements with their EXPLAIN QUERY PLAN.
+#
+# Off by default and close to free when off: timed operations check one flag,
+# and connections are plain sqlite3 connections. Connections opened while
+# profiling is on use ProfiledConnection, whose cursors time every statement,
+# so turning it on or off takes effect as connections are (re)opened.
+
+# Histogram bucket upper bounds in ms; the last bucket is open-ended
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+SLOW_QUERY_MS = 50
+SLOW_LOG_SIZE = 50
+# Statements run outside any timed operation (startup, migrations, ...)
+NO_OPERATION = "(other)"
+
+class Stats:
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.statements = 0
+        self.rows = 0
+        self.sql_time = 0.0
+
+    def add(self, ms):
+        self.calls += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+        index = 0
+        while index < len(BUCKETS_MS) and ms > BUCKETS_MS[index]:
+            index += 1
+        self.buckets[index] += 1
+
+    def percentile(self, fraction):
+        # Upper bound of the bucket holding the percentile (the max for the last one)
+        if not self.calls:
+            return 0.0
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen >= fraction * self.calls:
+                return min(BUCKETS_MS[index], self.max) if index < len(BUCKETS_MS) else self.max
+        return self.max
+
+    def summary(self):
+        per_call = max(self.calls, 1)
+        return {"calls": self.calls, "total_ms": round(self.total, 3), "max_ms": round(self.max, 3),
+                "p50_ms": round(self.percentile(0.5), 3), "p95_ms": round(self.percentile(0.95), 3),
+                "statements": self.statements, "rows": self.rows, "sql_ms": round(self.sql_time, 3),
+                "statements_per_call": round(self.statements / per_call, 1),
+                "rows_per_call": round(self.rows / per_call, 1),
+                "histogram": dict(zip([f"<={b}ms" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"], self.buckets))}
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.slow_ms = SLOW_QUERY_MS
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.stats = {}
+            self.slow = []
+            self.started = time.time()
+
+    def _stats(self, name):
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = Stats()
+        return stats
+
+    # --- Operations ---
+    def timed(self, name):
+        # Decorator: times each call of the function as operation `name`
+        def decorate(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with self.operation(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def operation(self, name):
+        # Context manager timing the enclosed block; SQL run inside it is charged
+        # to the outermost operation on this thread (the UI action)
+        return Operation(self, name) if self.enabled else NULL_OPERATION
+
+    def current(self):
+        stack = getattr(self.local, "stack", None)
+        return stack[0] if stack else NO_OPERATION
+
+    # --- SQL ---
+    def record_sql(self, seconds, rows, first=False):
+        # first: the statement was just executed (as opposed to more rows fetched)
+        with self.lock:
+            stats = self._stats(self.current())
+            stats.statements += first
+            stats.rows += rows
+            stats.sql_time += seconds * 1000
+
+    def record_slow(self, sql, params, ms, plan):
+        with self.lock:
+            self.slow.append({"operation": self.current(), "ms": round(ms, 3), "sql": " ".join(sql.split()),
+                              "params": [repr(p)[:80] for p in params][:20], "plan": plan,
+                              "at": time.strftime("%Y-%m-%d %H:%M:%S")})
+            self.slow.sort(key=lambda entry: -entry["ms"])
+            del self.slow[SLOW_LOG_SIZE:]
+
+    # --- Reports ---
+    def snapshot(self):
+        with self.lock:
+            return {"enabled": self.enabled, "since": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.started)),
+                    "slow_query_ms": self.slow_ms,
+                    "operations": {name: stats.summary() for name, stats in sorted(self.stats.items())},
+                    "slow_queries": list(self.slow)}
+
+    def export(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+class Operation:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        local = self.profiler.local
+        if not hasattr(local, "stack"):
+            local.stack = []
+        local.stack.append(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        ms = (time.perf_counter() - self.start) * 1000
+        self.profiler.local.stack.pop()
+        with self.profiler.lock:
+            self.profiler._stats(self.name).add(ms)
+        return False
+
+class NullOperation:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_OPERATION = NullOperation()
+
+# Shared by the whole process
+profiler = Profiler()
+
+# --- Profiled connections ---
+# The time of a statement is what its execute and fetch calls took, so a
+# cursor that's iterated lazily is still charged only for the rows it read.
+# A statement is logged once, when its time first passes profiler.slow_ms.
+PLANNED = ("select", "with", "insert", "update", "delete", "replace")
+
+class ProfiledCursor(sqlite3.Cursor):
+    def execute(self, sql, params=()):
+        self._sql, self._params, self._elapsed, self._logged = sql, params, 0.0, False
+        start = time.perf_counter()
+        super().execute(sql, params)
+        self._charge(start, max(self.rowcount, 0), True)
+        return self
+
+    def executemany(self, sql, seq):
+        self._sql, self._params, self._elapsed, self._logged = sql, (), 0.0, False
+        start = time.perf_counter()
+        super().executemany(sql, seq)
+        self._charge(start, max(self.rowcount, 0), True)
+        return self
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._charge(start, row is not None)
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._charge(start, len(rows))
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._charge(start, len(rows))
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._charge(start, 0)
+            raise
+        self._charge(start, 1)
+        return row
+
+    def _charge(self, start, rows, first=False):
+        seconds = time.perf_counter() - start
+        profiler.record_sql(seconds, rows, first)
+        self._elapsed += seconds * 1000
+        if not self._logged and self._elapsed >= profiler.slow_ms:
+            self._logged = True
+            profiler.record_slow(self._sql, self._params, self._elapsed, self._plan())
+
+    def _plan(self):
+        if not self._sql.lstrip().lower().startswith(PLANNED):
+            return []
+        try:
+            # A plain cursor, so the plan itself isn't counted
+            cursor = sqlite3.Connection.cursor(self.connection, sqlite3.Cursor)
+            rows = cursor.execute("EXPLAIN QUERY PLAN " + self._sql, self._params).fetchall()
+        except sqlite3.Error as e:
+            return [f"(no plan: {e})"]
+        return [row[-1] for row in rows]
+
+class ProfiledConnection(sqlite3.Connection):
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq):
+        return self.cursor().executemany(sql, seq)
+
+def connection_class():
+    return ProfiledConnection if profiler.enabled else sqlite3.Connection
@@ -0,0 +1,123 @@
+import random
+import threading
+from array import array
+from collections import OrderedDict
+
+# --- Random pick ---
+# Picks a prompt id from a filter without fetching every matching row.
+#
+# uniform    plain filters (All / Favorites / a category) probe random ids in
+#            [MIN(id), MAX(id)] and keep the first one that matches; the match
+#            density comes from prompt_stats, so sparse filters skip straight
+#            to the id cache below.
+# favorites  like uniform, but favorites are FAVORITE_WEIGHT times as likely
+# lru        random pick among the LRU_POOL least recently used matches
+# shuffle    walks a per-filter shuffled deck, no repeats until it's exhausted
+#
+# Searches, sparse filters and the weighted modes use a per-filter id array
+# built once with a single id-only query and reused until
+# vault_meta.membership_version says the matching set may have changed.
+
+MODES = ("uniform", "favorites", "lru", "shuffle")
+MODE_LABELS = {
+    "uniform": "Uniform",
+    "favorites": "Favor Favorites",
+    "lru": "Least Recently Used",
+    "shuffle": "No Repeats Until Exhausted",
+}
+FAVORITE_WEIGHT = 4.0
+LRU_POOL = 32
+PROBES = 16
+# Below this share of matching ids in the id range, probing misses too often
+MIN_PROBE_DENSITY = 0.25
+MAX_CACHED_FILTERS = 16
+
+class FilterIds:
+    def __init__(self, version, rows):
+        self.version = version
+        self.ids = array("q", (row[0] for row in rows))
+        self.favorites = array("q", (row[0] for row in rows if row[1]))
+        self.others = array("q", (row[0] for row in rows if not row[1]))
+        self.deck = None
+        self.left = 0
+
+class RandomPicker:
+    def __init__(self, rng=None):
+        self.rng = rng or random.Random()
+        self.filters = OrderedDict()
+        self.lock = threading.Lock()
+
+    def clear(self):
+        with self.lock:
+            self.filters.clear()
+
+    def pick(self, db, cat="All", search="", mode="uniform"):
+        search = search.strip()
+        if mode not in MODES:
+            raise ValueError(f"Unknown random mode '{mode}'")
+        if mode == "lru":
+            rows = db.query_prompts("p.id", cat, search, order="stale", limit=LRU_POOL)
+            return self.rng.choice(rows)[0] if rows else None
+        if mode == "uniform" and not search:
+            found, prompt_id = self._probe(db, cat)
+            if found:
+                return prompt_id
+        with self.lock:
+            entry = self._filter_ids(db, cat, search)
+            if not entry.ids:
+                return None
+            if mode == "favorites":
+                return self._weighted(entry)
+            if mode == "shuffle":
+                return self._deal(entry)
+            return entry.ids[self.rng.randrange(len(entry.ids))]
+
+    def _probe(self, db, cat):
+        # Returns (decided, id); decided is False when the caller should use the id cache
+        count = db.count_prompts(cat)
+        if not count:
+            return True, None
+        low, high = db.id_range()
+        if low is None or count / (high - low + 1) < MIN_PROBE_DENSITY:
+            return False, None
+        if cat == "All":
+            query, extra = "SELECT id FROM prompts WHERE id = ?", ()
+        elif cat == "Favorites":
+            query, extra = "SELECT id FROM prompts WHERE id = ? AND favorite = 1", ()
+        else:
+            query, extra = "SELECT id FROM prompts WHERE id = ? AND category = ?", (cat,)
+        for _ in range(PROBES):
+            row = db.conn.execute(query, (self.rng.randint(low, high),) + extra).fetchone()
+            if row:
+                return True, row[0]
+        return False, None
+
+    def _filter_ids(self, db, cat, search):
+        key = (db.path, cat, search)
+        version = db.membership_version()
+        entry = self.filters.get(key)
+        if entry is None or entry.version != version:
+            entry = FilterIds(version, db.query_prompts("p.id, p.favorite", cat, search, order=False))
+            self.filters[key] = entry
+            if len(self.filters) > MAX_CACHED_FILTERS:
+                self.filters.popitem(last=False)
+        self.filters.move_to_end(key)
+        return entry
+
+    def _weighted(self, entry):
+        favorites, others = entry.favorites, entry.others
+        weight = FAVORITE_WEIGHT * len(favorites)
+        if favorites and self.rng.random() * (weight + len(others)) < weight:
+            return favorites[self.rng.randrange(len(favorites))]
+        return others[self.rng.randrange(len(others))]
+
+    def _deal(self, entry):
+        # Lazy Fisher-Yates: swap the dealt id behind the `left` boundary
+        if entry.deck is None or entry.left == 0:
+            entry.deck = array("q", entry.ids)
+            entry.left = len(entry.deck)
+        deck = entry.deck
+        i = self.rng.randrange(entry.left)
+        entry.left -= 1
+        deck[i], deck[entry.left] = deck[entry.left], deck[i]
+        return deck[entry.left]
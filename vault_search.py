@@ -0,0 +1,116 @@
+import queue
+import sqlite3
+import threading
+
+from vault_db import VaultDB, connect
+
+# --- Background search ---
+# Keystrokes are coalesced for `delay_ms`, then the newest (filter, search) pair is
+# handed to a worker thread that runs fetch(db, cat, search) on its own connection. Every request
+# bumps a generation counter; a stale query still running on the worker is
+# interrupted, and only the result of the newest generation reaches on_result.
+# A query that fails for any other reason reaches on_error(exception) instead;
+# the worker carries on with the next request.
+# Results are picked up on the Tk thread by polling with root.after, so the
+# worker never touches Tk.
+class SearchScheduler:
+    POLL_MS = 15
+
+    def __init__(self, root, db, fetch, on_result, delay_ms=150, on_error=None):
+        self.root = root
+        self.fetch = fetch
+        self.path = db.path
+        self.fts_enabled = db.fts_enabled
+        self.on_result = on_result
+        self.on_error = on_error
+        self.delay_ms = delay_ms
+        self.generation = 0
+        self._pending = None
+        self._polling = None
+        self._lock = threading.Lock()
+        self._result = None
+        self._reopen = False
+        self._worker_db = None
+        self._requests = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="vault-search", daemon=True)
+        self._thread.start()
+
+    def schedule(self, cat, search, delay_ms=None):
+        self.generation += 1
+        if self._pending is not None:
+            self.root.after_cancel(self._pending)
+        delay = self.delay_ms if delay_ms is None else delay_ms
+        self._pending = self.root.after(delay, self._submit, self.generation, cat, search)
+        self._cancel_running()
+
+    def reset(self):
+        # The database file was swapped out underneath us (restore)
+        self._reopen = True
+
+    def shutdown(self):
+        if self._pending is not None:
+            self.root.after_cancel(self._pending)
+        if self._polling is not None:
+            self.root.after_cancel(self._polling)
+        self._requests.put(None)
+
+    def _cancel_running(self):
+        with self._lock:
+            if self._worker_db is not None and self._worker_db.conn is not None:
+                self._worker_db.conn.interrupt()
+
+    def _submit(self, generation, cat, search):
+        self._pending = None
+        self._requests.put((generation, cat, search))
+        if self._polling is None:
+            self._polling = self.root.after(self.POLL_MS, self._poll)
+
+    def _poll(self):
+        self._polling = None
+        with self._lock:
+            result, self._result = self._result, None
+        if result is not None and result[0] == self.generation:
+            if result[2] is not None:
+                if self.on_error:
+                    self.on_error(result[2])
+            elif result[1] is not None:
+                self.on_result(result[1])
+            return
+        self._polling = self.root.after(self.POLL_MS, self._poll)
+
+    def _run(self):
+        db = VaultDB(self.path)
+        db.fts_enabled = self.fts_enabled
+        with self._lock:
+            self._worker_db = db
+        while True:
+            request = self._requests.get()
+            # Skip ahead to the newest request that queued up while we were busy
+            while request is not None and not self._requests.empty():
+                request = self._requests.get()
+            if request is None:
+                break
+            generation, cat, search = request
+            if generation != self.generation:
+                continue
+            if self._reopen:
+                self._reopen = False
+                with self._lock:
+                    db.close()
+                    db.conn = connect(self.path)
+            result = error = None
+            try:
+                result = self.fetch(db, cat, search)
+            except sqlite3.OperationalError:
+                # Interrupted because a newer search superseded this one, or the
+                # database is busy; either way there is nothing to show
+                pass
+            except Exception as e:
+                # Anything else (a damaged database, a semantic index that can't
+                # be read) is reported, and must not end the worker
+                error = e
+            with self._lock:
+                self._result = (generation, result, error)
+        with self._lock:
+            self._worker_db = None
+            db.close()
@@ -0,0 +1,492 @@
+import os
+import random
+import re
+import threading
+import zlib
+from functools import lru_cache
+from importlib.util import find_spec
+from math import log, sqrt
+
+from vault_dedupe import preset_tags
+from vault_presets import split_tags, tag_key
+
+# --- Semantic index ---
+# "More like this" search over the positive prompts: every prompt is embedded
+# as a unit-length float32 vector, so a query is one matrix product against all
+# of them (cosine similarity) and a top-k pick. Needs numpy; available() says
+# whether it's there. numpy is only imported by the paths that build, sync or
+# query the index, so opening a vault (which sets up the triggers) doesn't load
+# it and startup stays fast.
+#
+# The vectors live in a memory-mapped matrix next to the database
+# (prompt_vault.db.vectors, row 0 is a header), the model's state in
+# prompt_vault.db.vectors.npz, and semantic_rows maps matrix rows to prompts.
+# As with the near-duplicate index, triggers queue changed prompts in
+# semantic_dirty and sync() folds the queue in: saves and deletes sync right
+# away, anything else (imports, the server) is caught up by the next query.
+# Nothing is built (or queued) until the first semantic search.
+#
+# Every sync bumps a generation number in both vault_meta and the header, and
+# each build picks a new build id, so a matrix that doesn't belong to the
+# database (a crash mid-sync, a restored backup) is rebuilt instead of trusted.
+
+# 128 floats keep a 100k-prompt matrix at 50 MB, one pass of which is a few ms
+DIM = 128
+IDF_BITS = 18
+SUBWORD = 4
+SUBWORD_WEIGHT = 0.3
+MAX_PHRASE_WORDS = 4
+# Term projections are cached; past this many the cache starts over (between batches)
+MAX_CACHED_TERMS = 50000
+BATCH = 512
+SAVE_SYNC_LIMIT = 200
+MIN_SCORE = 0.1
+# Query expansion: the best matches' vectors are blended into the query, so
+# prompts that use the same words as the matches (not just the query) rank too
+FEEDBACK_DOCS = 8
+FEEDBACK_WEIGHT = 0.7
+MAGIC = 0x31564556
+NEEDS_NUMPY = "Semantic search needs numpy: pip install numpy"
+NOT_BUILT = "The semantic index isn't built yet"
+WORD = re.compile(r"[^\W_]+")
+# Tags repeat across prompts, so their keys and terms are worth remembering
+TAG_CACHE = 65536
+
+# Optional: without numpy everything works except semantic search
+np = None
+
+def available():
+    # Whether numpy is installed, without importing it
+    return np is not None or find_spec("numpy") is not None
+
+def load_numpy():
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            raise ValueError(NEEDS_NUMPY) from None
+        np = numpy
+
+def init_semantic(cursor):
+    cursor.execute("CREATE TABLE IF NOT EXISTS semantic_rows (row INTEGER PRIMARY KEY, prompt_id INTEGER UNIQUE)")
+    cursor.execute("CREATE TABLE IF NOT EXISTS semantic_dirty (prompt_id INTEGER PRIMARY KEY)")
+    cursor.executemany("INSERT OR IGNORE INTO vault_meta (key, value) VALUES (?, 0)",
+                       [("semantic_generation",), ("semantic_build",)])
+    # ON CONFLICT rather than INSERT OR IGNORE, as in init_dedupe. Nothing is
+    # queued until the first build has started (it sets semantic_build).
+    when = "WHEN (SELECT value FROM vault_meta WHERE key = 'semantic_build') != 0"
+    queue = "INSERT INTO semantic_dirty (prompt_id) VALUES ({}.id) ON CONFLICT(prompt_id) DO NOTHING;"
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS semantic_ai AFTER INSERT ON prompts {when} BEGIN {queue.format('new')} END")
+    cursor.execute(f"CREATE TRIGGER IF NOT EXISTS semantic_ad AFTER DELETE ON prompts {when} BEGIN {queue.format('old')} END")
+    cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS semantic_au AFTER UPDATE OF positive ON prompts {when}
+                       BEGIN {queue.format('new')} END""")
+
+# --- Model ---
+# The default embedding is hashed TF-IDF. A prompt's terms are its words and
+# its short multi-word tags, weighted by log term frequency times IDF; each term
+# is hashed with a random sign into `dim` buckets, together with its character
+# 4-grams at a lower weight so "neon-lit" and "neons" still overlap.
+#
+# Another model can be plugged in with set_model(): anything with a `name`,
+# `dim`, fit(texts) (learn from the vault's prompts), state() / load(state)
+# (numpy arrays to keep in the .npz) and embed(texts) -> unit rows.
+class HashedNgrams:
+    name = "hashed-ngrams-1"
+
+    def __init__(self, dim=DIM):
+        self.dim = dim
+        self.idf = None
+        self.lock = threading.Lock()
+        self.terms = {}
+        self.projection = np.zeros((1024, dim), np.float32)
+        self.buckets = np.zeros(1024, np.int64)
+
+    def state(self):
+        return {"idf": self.idf}
+
+    def load(self, state):
+        self.idf = state["idf"]
+
+    def fit(self, texts):
+        df, docs, pending = np.zeros(1 << IDF_BITS), 0, []
+        for text in texts:
+            docs += 1
+            pending.extend(zlib.crc32(term.encode(), 1) & ((1 << IDF_BITS) - 1) for term in self.split(text))
+            if len(pending) > 1000000:
+                df += np.bincount(pending, minlength=len(df))
+                pending = []
+        if pending:
+            df += np.bincount(pending, minlength=len(df))
+        self.idf = (np.log((1 + docs) / (1 + df)) + 1).astype(np.float32)
+
+    def split(self, text):
+        # {term: count}
+        counts = {}
+        for tag in split_tags(text or ""):
+            for term in tag_terms(tag):
+                counts[term] = counts.get(term, 0) + 1
+        return counts
+
+    def embed(self, texts):
+        with self.lock:
+            if len(self.terms) >= MAX_CACHED_TERMS:
+                self.terms = {}
+            docs, terms, weights = [], [], []
+            for i, text in enumerate(texts):
+                for term, count in self.split(text).items():
+                    docs.append(i)
+                    terms.append(self.term(term))
+                    weights.append(1 + log(count))
+            out = np.zeros((len(texts), self.dim), np.float32)
+            if not terms:
+                return out
+            terms = np.array(terms)
+            weights = np.array(weights, np.float32) * self.idf[self.buckets[terms]]
+            # Entries are grouped by document, so each document's sum is one reduceat segment
+            docs = np.array(docs)
+            starts = np.flatnonzero(np.r_[True, docs[1:] != docs[:-1]])
+            out[docs[starts]] = np.add.reduceat(self.projection[terms] * weights[:, None], starts)
+        norms = np.linalg.norm(out, axis=1)
+        out[norms > 0] /= norms[norms > 0, None]
+        return out
+
+    def term(self, term):
+        # The term's row in the projection cache, computed on first use
+        index = self.terms.get(term)
+        if index is not None:
+            return index
+        index = len(self.terms)
+        if index == len(self.projection):
+            self.projection = np.resize(self.projection, (2 * index, self.dim))
+            self.buckets = np.resize(self.buckets, 2 * index)
+        row = self.projection[index]
+        row[:] = 0
+        features = [(term, 1.0)]
+        if " " not in term and len(term) > SUBWORD:
+            padded = f"<{term}>"
+            grams = [padded[i:i + SUBWORD] for i in range(len(padded) - SUBWORD + 1)]
+            features += [(gram, SUBWORD_WEIGHT / sqrt(len(grams))) for gram in grams]
+        for feature, weight in features:
+            h = zlib.crc32(feature.encode())
+            row[h % self.dim] += weight if h & 0x80000000 else -weight
+        self.buckets[index] = zlib.crc32(term.encode(), 1) & ((1 << IDF_BITS) - 1)
+        self.terms[term] = index
+        return index
+
+@lru_cache(maxsize=TAG_CACHE)
+def cached_key(tag):
+    return tag_key(tag)
+
+@lru_cache(maxsize=TAG_CACHE)
+def tag_terms(tag):
+    words = WORD.findall(cached_key(tag))
+    return tuple(words) + ((" ".join(words),) if 1 < len(words) <= MAX_PHRASE_WORDS else ())
+
+model_factory = HashedNgrams
+
+def set_model(factory):
+    # Indexes built with another model are rebuilt on their next use
+    global model_factory
+    model_factory = factory
+
+# --- Index files ---
+def vectors_path(path):
+    return path + ".vectors"
+
+def state_path(path):
+    return path + ".vectors.npz"
+
+def meta(conn, key):
+    return conn.execute("SELECT value FROM vault_meta WHERE key = ?", (key,)).fetchone()[0]
+
+def clean(text, ignore):
+    # Preset tags (score_9, ...) are on nearly every prompt and would swamp the rest
+    return ", ".join(tag for tag in split_tags(text or "") if cached_key(tag) not in ignore)
+
+class Index:
+    # One per database file, shared by every connection in the process
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self.model = None
+        self.matrix = None
+        self.ids = None
+        self.generation = None
+
+    def load(self, conn):
+        # Maps the files if they match the database; leaves generation None if not
+        self.generation = None
+        generation, build = meta(conn, "semantic_generation"), meta(conn, "semantic_build")
+        if not generation or not os.path.exists(vectors_path(self.path)) or not os.path.exists(state_path(self.path)):
+            return
+        with np.load(state_path(self.path)) as state:
+            name, dim = str(state["model"]), int(state["dim"])
+            model = self.model if self.model is not None and self.model.name == name else model_factory()
+            if model.name != name or model.dim != dim or int(state["build"]) != build:
+                return
+            model.load({key: state[key] for key in state.files if key not in ("model", "dim", "build")})
+        self.model = model
+        self.map_matrix()
+        header = self.matrix[0].view(np.uint32)
+        if tuple(header[:3]) != (MAGIC, generation & 0xFFFFFFFF, build):
+            return
+        self.ids = np.full(len(self.matrix), -1, np.int64)
+        rows = np.array(conn.execute("SELECT row, prompt_id FROM semantic_rows WHERE prompt_id IS NOT NULL").fetchall(),
+                        np.int64).reshape(-1, 2)
+        rows = rows[rows[:, 0] < len(self.ids)]
+        self.ids[rows[:, 0]] = rows[:, 1]
+        self.generation = generation
+
+    def map_matrix(self):
+        rows = os.path.getsize(vectors_path(self.path)) // (4 * self.model.dim)
+        self.matrix = np.memmap(vectors_path(self.path), np.float32, "r+", shape=(rows, self.model.dim))
+
+    def reserve(self, rows):
+        # Grows the file in place (never replaced, so other processes' maps stay valid)
+        if self.matrix is not None and rows <= len(self.matrix):
+            return
+        if self.matrix is not None:
+            self.matrix.flush()
+            rows = max(rows, 2 * len(self.matrix))
+        self.matrix = None
+        with open(vectors_path(self.path), "ab") as f:
+            if f.tell() < rows * 4 * self.model.dim:
+                f.truncate(rows * 4 * self.model.dim)
+        self.map_matrix()
+        old = self.ids if self.ids is not None else np.zeros(0, np.int64)
+        self.ids = np.full(len(self.matrix), -1, np.int64)
+        self.ids[:len(old)] = old[:len(self.ids)]
+
+    def commit(self, conn, build):
+        # Called inside the write transaction that also changes semantic_rows
+        generation = meta(conn, "semantic_generation") + 1
+        header = self.matrix[0].view(np.uint32)
+        # No flush: other processes map the same pages, and a crash that loses
+        # writes is caught by the header check (or costs a few stale vectors)
+        header[:3] = (MAGIC, generation & 0xFFFFFFFF, build)
+        conn.executemany("UPDATE vault_meta SET value = ? WHERE key = ?",
+                         [(generation, "semantic_generation"), (build, "semantic_build")])
+        self.generation = generation
+
+    def top(self, queries, limit, allowed=None, expand=True, exclude=None):
+        # [(prompt_id, score)] per query row, best first
+        matrix, ids = self.matrix, self.ids
+        valid = ids >= 0
+        if allowed is not None:
+            # A lookup table by prompt id; free rows (-1) index its last slot, which is False
+            lookup = np.zeros(max(int(ids.max()), int(allowed.max(initial=0))) + 2, bool)
+            lookup[allowed] = True
+            valid &= lookup[ids]
+        if exclude is not None:
+            valid[exclude] = False
+        rows = np.flatnonzero(valid)
+        if not len(rows):
+            return [[] for _ in queries]
+        if len(rows) < len(valid) // 4:
+            # A narrow filter: gathering its rows beats a pass over the whole matrix
+            matrix, ids, valid = matrix[rows], ids[rows], None
+        else:
+            used = rows[-1] + 1
+            matrix, ids, valid = matrix[:used], ids[:used], valid[:used]
+        scores = self.scores(matrix, queries, valid)
+        if expand:
+            best = np.argpartition(-scores, min(FEEDBACK_DOCS, len(matrix)) - 1, axis=1)[:, :FEEDBACK_DOCS]
+            feedback = np.stack([matrix[best[q]][scores[q, best[q]] > 0].sum(axis=0) for q in range(len(queries))])
+            norms = np.linalg.norm(feedback, axis=1, keepdims=True)
+            queries = queries + FEEDBACK_WEIGHT * np.divide(feedback, norms, out=np.zeros_like(feedback), where=norms > 0)
+            queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-9)
+            scores = self.scores(matrix, queries, valid)
+        k = min(limit, len(matrix))
+        results = []
+        for row_scores in scores:
+            best = np.argpartition(-row_scores, k - 1)[:k]
+            best = best[np.argsort(-row_scores[best], kind="stable")]
+            results.append([(int(ids[row]), round(float(row_scores[row]), 3)) for row in best if row_scores[row] >= MIN_SCORE])
+        return results
+
+    def scores(self, matrix, queries, valid):
+        # One row of scores per query
+        scores = queries.astype(np.float32) @ matrix.T
+        if valid is not None:
+            scores[:, ~valid] = -np.inf
+        return scores
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def index_for(db):
+    key = os.path.abspath(db.path)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = Index(db.path)
+        return _indexes[key]
+
+def current(db):
+    # The loaded index, reloaded if another connection or process synced it; None if it needs a build
+    index = index_for(db)
+    with index.lock:
+        if index.generation != meta(db.conn, "semantic_generation"):
+            index.load(db.conn)
+        return index if index.generation is not None else None
+
+# --- Index maintenance ---
+def built(db):
+    return meta(db.conn, "semantic_generation") > 0
+
+def build(db, progress=None):
+    # (Re)indexes every prompt; returns how many. Changes made meanwhile are
+    # queued by the triggers and picked up by the next sync.
+    load_numpy()
+    conn = db.conn
+    index = index_for(db)
+    with index.lock:
+        index.generation = None
+        build_id = random.randrange(1, 1 << 31)
+        with conn:
+            conn.execute("DELETE FROM semantic_dirty")
+            # A first build turns the triggers' queueing on
+            conn.execute("UPDATE vault_meta SET value = ? WHERE key = 'semantic_build' AND value = 0", (build_id,))
+        ignore = preset_tags(db)
+        index.model = model = model_factory()
+        model.fit(clean(pos, ignore) for (pos,) in conn.execute("SELECT positive FROM prompts"))
+        with open(state_path(db.path) + ".tmp", "wb") as f:
+            np.savez(f, model=model.name, dim=model.dim, build=build_id, **model.state())
+        os.replace(state_path(db.path) + ".tmp", state_path(db.path))
+        index.matrix, index.ids = None, None
+        index.reserve(conn.execute("SELECT COUNT(*) FROM prompts").fetchone()[0] * 9 // 8 + 64)
+        placed, last = [], 0
+        while True:
+            rows = conn.execute("SELECT id, positive FROM prompts WHERE id > ? ORDER BY id LIMIT ?", (last, BATCH)).fetchall()
+            if not rows:
+                break
+            start = len(placed) + 1
+            index.reserve(start + len(rows))
+            index.matrix[start:start + len(rows)] = model.embed([clean(pos, ignore) for _, pos in rows])
+            placed += [(start + i, prompt_id) for i, (prompt_id, _) in enumerate(rows)]
+            last = rows[-1][0]
+            if progress:
+                progress(len(placed))
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM semantic_rows")
+            conn.executemany("INSERT INTO semantic_rows (row, prompt_id) VALUES (?, ?)", placed)
+            index.ids[:] = -1
+            if placed:
+                rows = np.array(placed, np.int64)
+                index.ids[rows[:, 0]] = rows[:, 1]
+            index.commit(conn, build_id)
+    return len(placed)
+
+def sync(db, limit=None, progress=None):
+    # Indexes queued prompts; returns how many were processed. Does nothing
+    # before the first build. With no limit, an index that doesn't match the
+    # database is rebuilt; saves pass a limit and leave that to the next query.
+    if not built(db) or not available():
+        return 0
+    load_numpy()
+    index = current(db)
+    if index is None:
+        return build(db, progress) if limit is None else 0
+    conn = db.conn
+    done = 0
+    with index.lock:
+        while limit is None or done < limit:
+            batch = BATCH if limit is None else min(BATCH, limit - done)
+            try:
+                with conn:
+                    # Taking the write lock first keeps other processes' syncs out
+                    conn.execute("BEGIN IMMEDIATE")
+                    if index.generation != meta(conn, "semantic_generation"):
+                        index.load(conn)
+                        if index.generation is None:
+                            break
+                    ids = [row[0] for row in conn.execute("SELECT prompt_id FROM semantic_dirty LIMIT ?", (batch,))]
+                    if not ids:
+                        break
+                    marks = ", ".join("?" * len(ids))
+                    freed = [row[0] for row in conn.execute(f"SELECT row FROM semantic_rows WHERE prompt_id IN ({marks})", ids)]
+                    index.ids[[row for row in freed if row < len(index.ids)]] = -1
+                    conn.execute(f"UPDATE semantic_rows SET prompt_id = NULL WHERE prompt_id IN ({marks})", ids)
+                    rows = conn.execute(f"SELECT id, positive FROM prompts WHERE id IN ({marks})", ids).fetchall()
+                    if rows:
+                        free = [row[0] for row in conn.execute(
+                            "SELECT row FROM semantic_rows WHERE prompt_id IS NULL ORDER BY row LIMIT ?", (len(rows),))]
+                        end = conn.execute("SELECT COALESCE(MAX(row), 0) + 1 FROM semantic_rows").fetchone()[0]
+                        targets = free + list(range(end, end + len(rows) - len(free)))
+                        index.reserve(max(targets) + 1)
+                        ignore = preset_tags(db)
+                        index.matrix[targets] = index.model.embed([clean(pos, ignore) for _, pos in rows])
+                        placed = [(row, prompt_id) for row, (prompt_id, _) in zip(targets, rows)]
+                        conn.executemany("INSERT OR REPLACE INTO semantic_rows (row, prompt_id) VALUES (?, ?)", placed)
+                        index.ids[targets] = [prompt_id for _, prompt_id in placed]
+                    conn.execute(f"DELETE FROM semantic_dirty WHERE prompt_id IN ({marks})", ids)
+                    index.commit(conn, meta(conn, "semantic_build"))
+            except BaseException:
+                # The rows in memory may be ahead of the rolled-back database
+                index.generation = None
+                raise
+            done += len(ids)
+            if progress:
+                progress(done)
+    if index.generation is None and limit is None:
+        return done + build(db, progress)
+    return done
+
+def pending(db):
+    return db.conn.execute("SELECT COUNT(*) FROM semantic_dirty").fetchone()[0]
+
+def loaded(db):
+    # The index as it stands, for readers that mustn't write (the server's
+    # pool): nothing is synced or built, and a build or sync in progress is
+    # never waited on. None if there's no index to use yet.
+    load_numpy()
+    index = index_for(db)
+    if index.generation is None and index.lock.acquire(blocking=False):
+        try:
+            index.load(db.conn)
+        finally:
+            index.lock.release()
+    return index if index.generation is not None else None
+
+def ready(db, progress=None):
+    # The index, built or caught up first
+    load_numpy()
+    if built(db):
+        sync(db, progress=progress)
+    index = current(db)
+    if index is None:
+        build(db, progress)
+        index = current(db)
+    return index
+
+# --- Queries ---
+def allowed_ids(db, cat, search):
+    # None when every prompt is allowed
+    if cat in ("All", "", None) and not search.strip():
+        return None
+    return np.fromiter((row[0] for row in db.query_prompts("p.id", cat, search, order=False)), np.int64)
+
+def query_index(db, catch_up, progress):
+    index = ready(db, progress) if catch_up else loaded(db)
+    if index is None:
+        raise ValueError(NOT_BUILT)
+    return index
+
+def search(db, texts, limit=50, cat="All", search="", progress=None, catch_up=True):
+    # Batched: one [(prompt_id, score)] list per query text, best first, among
+    # the prompts in `cat` that match the keyword/tag `search`. catch_up=False
+    # queries the index as loaded() has it (ValueError if there is none).
+    index = query_index(db, catch_up, progress)
+    ignore = preset_tags(db)
+    queries = index.model.embed([clean(text, ignore) for text in texts])
+    return index.top(queries, limit, allowed_ids(db, cat, search))
+
+def more_like(db, prompt_id, limit=50, cat="All", search="", progress=None, catch_up=True):
+    # [(prompt_id, score)] for the prompts closest to prompt_id
+    index = query_index(db, catch_up, progress)
+    row = db.conn.execute("SELECT row FROM semantic_rows WHERE prompt_id = ?", (prompt_id,)).fetchone()
+    if row is None or not index.matrix[row[0]].any():
+        return []
+    query = np.array(index.matrix[row[0]])[None]
+    return index.top(query, limit, allowed_ids(db, cat, search), expand=False, exclude=row[0])[0]
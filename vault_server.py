@@ -0,0 +1,334 @@
+import asyncio
+import hashlib
+import json
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import vault_core
+import vault_semantic
+import vault_tags
+from vault_db import DB_PATH, VaultDB
+
+# --- Prompt service ---
+# A small HTTP/JSON server for generation workers, built on asyncio streams so
+# it needs nothing outside the standard library.
+#
+#   GET /prompt?title=...  or  /prompt?id=...   one prompt
+#   GET /random?category=&search=&mode=&touch=1 random prompt from a filter
+#   GET /search?q=&category=&limit=&mode=       matching prompts; mode=semantic
+#                                               ranks by meaning (needs numpy)
+#   GET /similar?id=&category=&limit=           semantic "more like this"
+#   GET /categories                             category -> count
+#   GET /tags?category=&q=&limit=               most used tags in a filter
+#   GET /health
+#
+# /prompt and /random accept pony=1 / realism=1 / preset=<name> (repeatable)
+# to return formatted text; /random, /search and /tags accept tag=a|b
+# (repeatable) to require exact tags.
+# Reads run on a pool of WAL connections; last_used updates go through one
+# writer thread that batches them. The writer also builds and syncs the
+# semantic index, which the pool only reads: until there is one, semantic
+# queries answer 503 and ask the writer to build it. Cacheable responses carry
+# an ETag and are served from memory until the database changes.
+
+MAX_HEADER_BYTES = 16384
+TOUCH_FLUSH_SECONDS = 0.5
+VERSION_CHECK_SECONDS = 0.25
+
+class ReadPool:
+    def __init__(self, path, size):
+        self.connections = queue.Queue()
+        for _ in range(size):
+            db = VaultDB(path, shared=True)
+            db.detect_fts()
+            self.connections.put(db)
+        self.executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="vault-read")
+
+    async def run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self._call, fn, args)
+
+    def _call(self, fn, args):
+        db = self.connections.get()
+        try:
+            return fn(db, *args)
+        finally:
+            self.connections.put(db)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        while not self.connections.empty():
+            self.connections.get().close()
+
+# The only connection that writes. Touches are coalesced per prompt and
+# committed together, so a burst of /random calls costs one transaction.
+# Between flushes it keeps the semantic index current (see update_index).
+class TouchWriter:
+    def __init__(self, path):
+        self.path = path
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.stop = threading.Event()
+        self.index_wanted = threading.Event()
+        self.index_failed = False
+        self.thread = threading.Thread(target=self._run, name="vault-writer", daemon=True)
+        self.thread.start()
+
+    def touch(self, prompt_id):
+        with self.lock:
+            self.pending[prompt_id] = vault_core.now_stamp()
+
+    def _flush(self, db):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        if pending:
+            with db.conn:
+                db.conn.executemany("UPDATE prompts SET last_used=? WHERE id=?",
+                                    [(stamp, prompt_id) for prompt_id, stamp in pending.items()])
+
+    def want_index(self):
+        # A semantic query found no index to read
+        self.index_wanted.set()
+
+    def _update_index(self, db):
+        # Builds the semantic index when a query asked for it; otherwise syncs
+        # an existing one when prompts are queued or it no longer matches the
+        # database (which rebuilds it). A failure is retried when a query asks.
+        wanted = self.index_wanted.is_set()
+        if not vault_semantic.available() or not (wanted or vault_semantic.built(db)):
+            return
+        if self.index_failed and not wanted:
+            return
+        try:
+            vault_semantic.load_numpy()
+            if wanted or vault_semantic.pending(db) or vault_semantic.current(db) is None:
+                self.index_wanted.clear()
+                vault_semantic.ready(db)
+            self.index_failed = False
+        except Exception as e:
+            self.index_failed = True
+            print(f"Updating the semantic index failed: {e}", file=sys.stderr)
+
+    def _run(self):
+        db = VaultDB(self.path)
+        try:
+            self._update_index(db)
+            while not self.stop.wait(TOUCH_FLUSH_SECONDS):
+                self._flush(db)
+                self._update_index(db)
+            self._flush(db)
+        finally:
+            db.close()
+
+    def close(self):
+        self.stop.set()
+        self.thread.join()
+
+# Cached responses are dropped when PRAGMA data_version moves, which happens
+# whenever another connection (the writer, the GUI, an import) commits.
+# Only touched from the event loop thread.
+class ResponseCache:
+    def __init__(self, path, max_entries=4096):
+        self.version_db = VaultDB(path)
+        self.max_entries = max_entries
+        self.entries = {}
+        self.version = None
+        self.checked = 0.0
+
+    def current_version(self):
+        now = time.monotonic()
+        if now - self.checked >= VERSION_CHECK_SECONDS:
+            self.checked = now
+            version = self.version_db.conn.execute("PRAGMA data_version").fetchone()[0]
+            if version != self.version:
+                self.version = version
+                self.entries.clear()
+        return self.version
+
+    def get(self, key):
+        self.current_version()
+        return self.entries.get(key)
+
+    def put(self, key, value):
+        if len(self.entries) >= self.max_entries:
+            self.entries.clear()
+        self.entries[key] = value
+
+    def close(self):
+        self.version_db.close()
+
+def make_etag(body):
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+def flag(params, name):
+    return params.get(name, ["0"])[0].lower() in ("1", "true", "yes")
+
+def tag_search(params, text):
+    return vault_tags.with_tags(text, ", ".join(params.get("tag", [])))
+
+def format_record(db, record, params):
+    names = vault_core.preset_names(flag(params, "pony"), flag(params, "realism"), params.get("preset", []))
+    if names:
+        pos, neg = vault_core.format_prompt(db, record["positive"], record["negative"], names, record["id"])
+        record = dict(record, positive=pos, negative=neg)
+    return record
+
+# --- Handlers (run on the read pool) ---
+def index_missing(db):
+    # The pool only reads the semantic index (the writer builds and syncs it)
+    if vault_semantic.loaded(db) is None:
+        return 503, {"error": vault_semantic.NOT_BUILT + "; it's being built, try again shortly"}
+    return None
+
+def handle_prompt(db, params):
+    if "id" in params:
+        record = vault_core.get_prompt(db, int(params["id"][0]))
+    else:
+        record = vault_core.get_prompt(db, params.get("title", [""])[0])
+    return (200, format_record(db, record, params)) if record else (404, {"error": "not found"})
+
+def handle_random(db, params):
+    cat = params.get("category", ["All"])[0]
+    mode = params.get("mode", ["uniform"])[0]
+    prompt_id = vault_core.random_prompt_id(db, cat, tag_search(params, params.get("search", [""])[0]), mode)
+    if prompt_id is None:
+        return 404, {"error": "no prompts match"}
+    return 200, format_record(db, db.prompt_record(prompt_id), params)
+
+def handle_search(db, params):
+    limit = int(params.get("limit", ["50"])[0])
+    cat = params.get("category", ["All"])[0]
+    if params.get("mode", ["keyword"])[0] == "semantic":
+        return index_missing(db) or (200, [dict(record, score=score) for record, score in
+                                           vault_core.semantic_search(db, params.get("q", [""])[0], cat, limit,
+                                                                      tag_search(params, ""), catch_up=False)])
+    return 200, vault_core.search(db, tag_search(params, params.get("q", [""])[0]), cat, limit)
+
+def handle_similar(db, params):
+    if "id" not in params:
+        return 400, {"error": "id is required"}
+    limit = int(params.get("limit", ["50"])[0])
+    cat = params.get("category", ["All"])[0]
+    return index_missing(db) or (200, [dict(record, score=score) for record, score in
+                                       vault_core.more_like(db, int(params["id"][0]), limit, cat,
+                                                            tag_search(params, ""), catch_up=False)])
+
+def handle_categories(db, params):
+    return 200, db.category_counts()
+
+def handle_tags(db, params):
+    limit = int(params.get("limit", ["50"])[0])
+    cat = params.get("category", ["All"])[0]
+    return 200, dict(db.tag_facets(cat, tag_search(params, params.get("q", [""])[0]), limit))
+
+ROUTES = {
+    "/prompt": (handle_prompt, True),
+    "/random": (handle_random, False),
+    "/search": (handle_search, True),
+    "/similar": (handle_similar, True),
+    "/categories": (handle_categories, True),
+    "/tags": (handle_tags, True),
+}
+
+class PromptServer:
+    def __init__(self, path=DB_PATH, readers=8):
+        # Make sure the schema exists before any reader opens
+        vault_core.open_vault(path).close()
+        self.pool = ReadPool(path, readers)
+        self.writer = TouchWriter(path)
+        self.cache = ResponseCache(path)
+
+    async def dispatch(self, target):
+        url = urlsplit(target)
+        path = unquote(url.path).rstrip("/") or "/"
+        params = parse_qs(url.query)
+        if path == "/health":
+            return 200, b'{"ok": true}', None
+        if path not in ROUTES:
+            return 404, b'{"error": "unknown endpoint"}', None
+        handler, cacheable = ROUTES[path]
+        if cacheable:
+            hit = self.cache.get(target)
+            if hit is not None:
+                return 200, hit[0], hit[1]
+        try:
+            status, payload = await self.pool.run(handler, params)
+        except (ValueError, sqlite3.Error) as e:
+            return 400, json.dumps({"error": str(e)}).encode(), None
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        if status == 503:
+            self.writer.want_index()
+        if status != 200:
+            return status, body, None
+        if path == "/random" and flag(params, "touch"):
+            self.writer.touch(payload["id"])
+        etag = make_etag(body)
+        if cacheable:
+            self.cache.put(target, (body, etag))
+        return status, body, etag
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, rest = lines[0].split(" ", 1)
+                    target, version = rest.rsplit(" ", 1)
+                except ValueError:
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+                if method not in ("GET", "HEAD"):
+                    status, body, etag = 405, b'{"error": "method not allowed"}', None
+                else:
+                    status, body, etag = await self.dispatch(target)
+                if etag is not None and headers.get("if-none-match") == etag:
+                    status, body = 304, b""
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                out = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, 'OK')}",
+                       "Content-Type: application/json; charset=utf-8",
+                       f"Content-Length: {len(body)}",
+                       "Connection: " + ("keep-alive" if keep_alive else "close")]
+                if etag is not None:
+                    out.append(f"ETag: {etag}")
+                writer.write(("\r\n".join(out) + "\r\n\r\n").encode() + (body if method == "GET" else b""))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8765, ready=None):
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEADER_BYTES)
+        if ready is not None:
+            ready(server.sockets[0].getsockname())
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.writer.close()
+        self.pool.close()
+        self.cache.close()
+
+STATUS_TEXT = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               503: "Service Unavailable"}
+
+def run(path=DB_PATH, host="127.0.0.1", port=8765, readers=8):
+    server = PromptServer(path, readers)
+    try:
+        asyncio.run(server.serve(host, port, lambda addr: print(f"Serving {path} on http://{addr[0]}:{addr[1]}")))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
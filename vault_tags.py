@@ -0,0 +1,68 @@
+# --- Tag autocomplete ---
+# An in-memory prefix trie over the vault's tags, built once from the tags
+# table. Every node keeps its SUGGESTIONS most used tags, so completing a prefix
+# costs one walk down the trie whatever the number of tags.
+
+SUGGESTIONS = 8
+
+class TagTrie:
+    def __init__(self, counts=(), size=SUGGESTIONS):
+        # counts: (name, uses) pairs, e.g. VaultDB.tag_counts()
+        self.size = size
+        self.root = {}
+        self.uses = {}
+        for name, uses in counts:
+            self.add(name, uses)
+
+    def add(self, name, uses=1):
+        # Adds `uses` to the tag's count (inserting it if it's new)
+        name = name.strip().lower()
+        if not name:
+            return
+        self.uses[name] = total = self.uses.get(name, 0) + uses
+        node = self.root
+        for ch in name:
+            node = node.setdefault(ch, {})
+            self._rank(node, name, total)
+
+    def _rank(self, node, name, uses):
+        top = [entry for entry in node.get("", ()) if entry[1] != name]
+        top.append((-uses, name))
+        top.sort()
+        node[""] = top[:self.size]
+
+    def complete(self, prefix, limit=SUGGESTIONS):
+        node = self.root
+        for ch in prefix.lstrip().lower():
+            node = node.get(ch)
+            if node is None:
+                return []
+        return [name for _, name in node.get("", ())[:limit]]
+
+    def __len__(self):
+        return len(self.uses)
+
+def tag_names(text):
+    # The distinct tags of a prompt's tags string, as the tags table stores them
+    # (lower-cased and trimmed, with tabs and line breaks read as spaces)
+    text = (text or "").lower().replace("\t", " ").replace("\n", " ").replace("\r", " ")
+    return {name.strip(" ") for name in text.split(",")} - {""}
+
+# --- Tag filters ---
+def split_filter(text):
+    # "cat girl, pony|sdxl" -> [["cat girl"], ["pony", "sdxl"]]: every group must
+    # match (AND), any tag within a group will do (OR)
+    groups = []
+    for part in text.split(","):
+        names = [name.strip().lower() for name in part.split("|") if name.strip()]
+        if names:
+            groups.append(names)
+    return groups
+
+def filter_search(text):
+    # Turns a tag filter into search terms (tag:"a" tag:"b|c") so it combines
+    # with any search text everywhere searches are accepted
+    return " ".join('tag:"' + "|".join(names).replace('"', "") + '"' for names in split_filter(text))
+
+def with_tags(search, tags_text):
+    return " ".join(part for part in (search.strip(), filter_search(tags_text)) if part)